@@ -3,6 +3,7 @@ from argparse import ArgumentParser
 from dotenv import load_dotenv
 
 from webspot.cmd.crawl import cmd_crawl
+from webspot.cmd.detect_batch import cmd_detect_batch
 from webspot.cmd.request import cmd_request
 from webspot.cmd.web import cmd_web
 from webspot.constants.html_request_method import HTML_REQUEST_METHOD_REQUEST
@@ -33,6 +34,16 @@ request_parser.add_argument('--url', '-U', help='url to request', required=True)
 request_parser.add_argument('--method', '-M', help='request method', default=HTML_REQUEST_METHOD_REQUEST)
 request_parser.set_defaults(func=cmd_request)
 
+detect_batch_parser = subparsers.add_parser('detect-batch')
+detect_batch_parser.add_argument('--input', '-i', help='directory, glob or jsonl ({url, html}) of pages',
+                                 required=True)
+detect_batch_parser.add_argument('--output', '-o', help='output jsonl file path (stdout if not set)')
+detect_batch_parser.add_argument('--workers', '-w', type=int, help='number of worker processes (cpu count by default)')
+detect_batch_parser.add_argument('--detectors', '-D', help='comma-separated detectors (all by default)')
+detect_batch_parser.add_argument('--resume', '-r', action='store_true', help='skip pages completed in output')
+detect_batch_parser.add_argument('--fetch', '-f', action='store_true', help='fetch jsonl pages without html by url')
+detect_batch_parser.set_defaults(func=cmd_detect_batch)
+
 if __name__ == '__main__':
     args = parser.parse_args()
     args.func(args)
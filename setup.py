@@ -24,6 +24,12 @@ setup(
         "Operating System :: OS Independent",
     ],
     install_requires=install_requires,
+    extras_require={
+        # dgl embed backend (random walks run on numpy by default)
+        'dgl': ['torch', 'dgl'],
+        # HTTP/2 of the async http client (WEBSPOT_HTTP_HTTP2=true)
+        'http2': ['httpx[http2]'],
+    },
     entry_points={
         'console_scripts': [
             'crawlab-cli=crawlab.cli.main:main'
@@ -1,14 +1,13 @@
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
-from pandas import DataFrame
-
 from webspot.constants.detector import DETECTOR_PLAIN_LIST, DETECTOR_PAGINATION
-from webspot.extract.extract_results import extract_rules
 
 
 def cmd_crawl(args):
+    # heavy modules are imported when the subcommand runs
+    from pandas import DataFrame
+    from webspot.extract.extract_results import extract_rules
+
     url = args.url
 
     results, execution_time, html_requester, graph_loader, detectors = extract_rules(
@@ -41,6 +40,9 @@ def cmd_crawl(args):
 
 
 def crawl_page(url, items_selector, fields, pagination_selector):
+    import requests
+    from bs4 import BeautifulSoup
+
     print(f'requesting {url}')
     res = requests.get(url)
     soup = BeautifulSoup(res.content, features='lxml')
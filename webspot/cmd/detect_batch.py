@@ -0,0 +1,210 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Iterator, Optional, Set, TextIO, List, Dict, Tuple
+
+from webspot.constants.detector import DETECTOR_PLAIN_LIST, DETECTOR_PAGINATION
+from webspot.extract.worker_pool import WorkerPool
+from webspot.logging import get_logger
+
+logger = get_logger('webspot.cmd.detect_batch')
+
+
+def _read_html(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _get_url_from_path(path: str) -> Optional[str]:
+    """Root url of pages saved as <data dir>/<domain>/html/<name>.html (HtmlRequester, WebSpider)."""
+    html_dir = os.path.dirname(os.path.abspath(path))
+    if os.path.basename(html_dir) != 'html':
+        return None
+    domain = os.path.basename(os.path.dirname(html_dir))
+    if '.' not in domain:
+        return None
+    return f'https://{domain}/'
+
+
+def _iterate_html_files(paths: List[str]) -> Iterator[dict]:
+    for path in sorted(paths):
+        yield {
+            'id': path,
+            'url': _get_url_from_path(path),
+            'html': _read_html(path),
+        }
+
+
+def _iterate_jsonl_lines(path: str) -> Iterator[Tuple[int, dict]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            yield i, json.loads(line)
+
+
+def _iterate_jsonl(path: str, fetch: bool = False) -> Iterator[dict]:
+    ids = set()
+    for i, page in _iterate_jsonl_lines(path):
+        url = page.get('url')
+
+        # id defaults to url, or to line number if the url is repeated (completed ids are skipped on resume)
+        if page.get('id') is not None:
+            page_id = str(page.get('id'))
+            if page_id in ids:
+                raise Exception(f'Duplicate id {page_id} at line {i + 1} of {path}')
+        elif url and url not in ids:
+            page_id = url
+        else:
+            page_id = str(i)
+        ids.add(page_id)
+
+        # pages without html are fetched by url only if required
+        if not page.get('html') and not (fetch and url):
+            raise Exception(f'Missing html of page {page_id} at line {i + 1} of {path} '
+                            f'(pages with url are fetched with --fetch)')
+
+        yield {
+            'id': page_id,
+            'url': url,
+            'html': page.get('html'),
+        }
+
+
+def iterate_pages(input_: str, fetch: bool = False) -> Iterator[dict]:
+    """
+    Pages ({id, url, html}) of a directory (html files, recursively), a glob pattern,
+    a JSONL file of {id, url, html} or a single html file.
+
+    Ids of JSONL pages default to url, or to line number if the url is repeated, and duplicate ids
+    raise an error. JSONL pages without html raise an error, unless `fetch` is set to fetch them by url.
+    """
+    if os.path.isdir(input_):
+        return _iterate_html_files(glob.glob(os.path.join(input_, '**', '*.html'), recursive=True))
+    elif glob.has_magic(input_):
+        return _iterate_html_files(glob.glob(input_, recursive=True))
+    elif input_.endswith('.jsonl') or input_.endswith('.ndjson'):
+        return _iterate_jsonl(input_, fetch=fetch)
+    elif os.path.isfile(input_):
+        return _iterate_html_files([input_])
+    else:
+        raise Exception(f'Invalid input: {input_}')
+
+
+def get_completed_ids(output_path: str) -> Set[str]:
+    """Ids of pages completed without error in an existing output (a truncated last line is ignored)."""
+    ids = set()
+    if not os.path.exists(output_path):
+        return ids
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('error') is None:
+                ids.add(record.get('id'))
+    return ids
+
+
+def run_batch(
+    pages: Iterator[dict],
+    output: TextIO,
+    worker_pool: WorkerPool,
+    detectors: List[str] = None,
+    skip_ids: Set[str] = None,
+    max_pending: int = None,
+) -> Dict[str, int]:
+    """
+    Run detection of pages on the worker pool, writing one JSONL record per page as soon as it
+    completes (in completion order). At most `max_pending` pages are in flight at a time.
+    """
+    if skip_ids is None:
+        skip_ids = set()
+    if max_pending is None:
+        max_pending = worker_pool.max_workers * 2
+
+    stats = {'done': 0, 'failed': 0, 'skipped': 0}
+    pending: Dict[Future, tuple] = {}
+
+    def _write(futures):
+        for future in futures:
+            page_id, url, tic = pending.pop(future)
+            record = {'id': page_id, 'url': url, 'results': None, 'execution_time': None, 'error': None}
+            try:
+                record['results'], record['execution_time'] = future.result()
+                record['execution_time']['total'] = round((time.time() - tic) * 1000)
+                stats['done'] += 1
+            except Exception as e:
+                record['error'] = f'{type(e).__name__}: {e}'
+                stats['failed'] += 1
+                logger.warning(f'failed to detect {page_id}: {record["error"]}')
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+
+    for page in pages:
+        # skip completed pages (resume)
+        if page['id'] in skip_ids:
+            stats['skipped'] += 1
+            continue
+
+        # wait for a slot
+        if len(pending) >= max_pending:
+            done, _ = wait(pending.keys(), return_when=FIRST_COMPLETED)
+            _write(done)
+
+        future = worker_pool.submit(url=page['url'], html=page['html'], detectors=detectors)
+        pending[future] = (page['id'], page['url'], time.time())
+
+    # remaining pages
+    while len(pending) > 0:
+        done, _ = wait(pending.keys(), return_when=FIRST_COMPLETED)
+        _write(done)
+
+    return stats
+
+
+def cmd_detect_batch(args):
+    detectors = args.detectors.split(',') if args.detectors else [DETECTOR_PLAIN_LIST, DETECTOR_PAGINATION]
+
+    # resume from completed pages of the output
+    skip_ids = set()
+    if args.resume:
+        if not args.output:
+            raise Exception('Output file is required to resume')
+        skip_ids = get_completed_ids(args.output)
+        logger.info(f'resuming: {len(skip_ids)} pages already completed')
+
+    # output (appended to if resuming, after a possibly truncated last line)
+    if args.output:
+        if args.resume and os.path.exists(args.output) and os.path.getsize(args.output) > 0:
+            with open(args.output, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                truncated = f.read(1) != b'\n'
+            output = open(args.output, 'a', encoding='utf-8')
+            if truncated:
+                output.write('\n')
+        else:
+            output = open(args.output, 'w', encoding='utf-8')
+    else:
+        output = sys.stdout
+
+    worker_pool = WorkerPool(max_workers=args.workers)
+    try:
+        stats = run_batch(
+            pages=iterate_pages(args.input, fetch=args.fetch),
+            output=output,
+            worker_pool=worker_pool,
+            detectors=detectors,
+            skip_ids=skip_ids,
+        )
+    finally:
+        worker_pool.shutdown()
+        if output is not sys.stdout:
+            output.close()
+
+    logger.info(f'done: {stats["done"]}, failed: {stats["failed"]}, skipped: {stats["skipped"]}')
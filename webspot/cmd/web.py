@@ -1,5 +1,4 @@
-import uvicorn
-
-
 def cmd_web(args):
+    import uvicorn
+
     uvicorn.run('webspot.web.app:app', reload=True, host=args.host, port=args.port, log_level=args.log_level)
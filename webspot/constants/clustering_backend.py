@@ -0,0 +1,9 @@
+CLUSTERING_BACKEND_DBSCAN = 'dbscan'
+CLUSTERING_BACKEND_HDBSCAN = 'hdbscan'
+CLUSTERING_BACKEND_GRID = 'grid'
+
+ALL_CLUSTERING_BACKENDS = [
+    CLUSTERING_BACKEND_DBSCAN,
+    CLUSTERING_BACKEND_HDBSCAN,
+    CLUSTERING_BACKEND_GRID,
+]
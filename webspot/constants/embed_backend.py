@@ -0,0 +1,7 @@
+EMBED_BACKEND_NUMPY = 'numpy'
+EMBED_BACKEND_DGL = 'dgl'
+
+ALL_EMBED_BACKENDS = [
+    EMBED_BACKEND_NUMPY,
+    EMBED_BACKEND_DGL,
+]
@@ -1,3 +1,5 @@
 REQUEST_STATUS_PENDING = 'pending'
+REQUEST_STATUS_QUEUED = 'queued'
+REQUEST_STATUS_RUNNING = 'running'
 REQUEST_STATUS_SUCCESS = 'success'
 REQUEST_STATUS_ERROR = 'error'
@@ -1,7 +1,8 @@
 from abc import abstractmethod
-from typing import List
+from typing import List, Type
 
 import numpy as np
+from bs4 import BeautifulSoup
 
 from webspot.detect.models.result import Result
 from webspot.graph.graph_loader import GraphLoader
@@ -9,6 +10,8 @@ from webspot.request.html_requester import HtmlRequester
 
 
 class BaseDetector(object):
+    result_cls: Type[Result] = Result
+
     def __init__(
         self,
         graph_loader: GraphLoader,
@@ -23,17 +26,38 @@ class BaseDetector(object):
         # results
         self.results: List[Result] = []
 
+    @classmethod
+    def from_results(cls, results: List[dict], html_requester: HtmlRequester, **kwargs) -> 'BaseDetector':
+        """Detector with results of a previous run (e.g. cached), without graph loader."""
+        detector = cls(graph_loader=None, html_requester=html_requester, **kwargs)
+        detector.results = [cls.result_cls(**r) for r in results]
+        return detector
+
+    def revalidate(self, results: List[dict]) -> bool:
+        """
+        Apply results of a previous run on a page of the same template (e.g. from the rule store),
+        keeping those still valid on this page without running detection. Returns False if none
+        is valid, in which case the detector should be run.
+        """
+        return False
+
     def get_nodes_idx_by_feature(self, feature_key: str, feature_value: str):
         feature = f'{feature_key}={feature_value}'
-        feature_tag_a_idx = np.argwhere(np.array(self.graph_loader.nodes_features_enc.feature_names_) == feature)[0]
-        return np.argwhere(self.graph_loader.nodes_features_tensor[:, feature_tag_a_idx].T[0] == 1)[0].detach().numpy()
+        feature_idx = np.argwhere(np.array(self.graph_loader.nodes_features_names) == feature)[0][0]
+        feature_vec = self.graph_loader.nodes_features_mat[:, feature_idx].toarray().ravel()
+        return np.flatnonzero(feature_vec == 1)
 
     def get_nodes_by_feature(self, feature_key: str, feature_value: str):
         nodes_idx = self.get_nodes_idx_by_feature(feature_key, feature_value)
         return [n for n in self.graph_loader.nodes[nodes_idx]]
 
-    @abstractmethod
     def highlight_html(self, html: str, **kwargs) -> str:
+        soup = BeautifulSoup(html, 'html.parser')
+        self.highlight_soup(soup, **kwargs)
+        return str(soup)
+
+    @abstractmethod
+    def highlight_soup(self, soup: BeautifulSoup, **kwargs):
         pass
 
     @abstractmethod
@@ -1,8 +1,6 @@
-from typing import Optional
+from typing import Optional, List
 
-import autopager
 import numpy as np
-import parsel
 from bs4 import BeautifulSoup
 
 from webspot.constants.detector import DETECTOR_PAGINATION
@@ -21,27 +19,23 @@ class PaginationDetector(BaseDetector):
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
-        self._at_res: list = []
-        self._el_next: Optional[parsel.selector.Selector] = None
+        self._at_res: Optional[list] = None
+        self._el_next = None  # parsel selector of the next link
         self.next_url: Optional[str] = None
 
-    def highlight_html(self, html: str, **kwargs) -> str:
-        soup = BeautifulSoup(html, 'html.parser')
-
+    def highlight_soup(self, soup: BeautifulSoup, **kwargs):
         if len(self.results) == 0:
-            return html
+            return
 
         result = self.results[0]
         next_selector = result.selectors.get('next')
         next_el = soup.select_one(next_selector.selector)
         if next_el is None:
-            return html
+            return
 
         add_class(next_el, ['webspot-highlight-container', 'webspot-highlight-node-color__red'])
         add_label(next_el, soup, f'Pagination', 'primary')
 
-        return str(soup)
-
     @property
     def root_url(self):
         return self.html_requester.url
@@ -64,12 +58,13 @@ class PaginationDetector(BaseDetector):
 
     @property
     def internal_link_nodes_idx(self):
-        nodes_ids = self.graph_loader.nodes_ids_tensor.detach().numpy()
-        internal_link_nodes_ids_enc = self.graph_loader.node_ids_enc.transform(self.internal_link_nodes_ids)
-        return np.argwhere(np.isin(nodes_ids, internal_link_nodes_ids_enc))
+        internal_link_nodes_idx = self.graph_loader.nodes_id_to_idx_vec[self.internal_link_nodes_ids]
+        return np.unique(internal_link_nodes_idx).reshape(-1, 1)
 
     def _train(self) -> np.array:
-        self._at_res = autopager.extract(self.html_requester.html_)
+        import autopager
+        if self._at_res is None:
+            self._at_res = autopager.extract(self.html_requester.html_)
         _els_next = [t[1] for t in self._at_res if t[0] == 'NEXT']
         if len(_els_next) == 0:
             return
@@ -102,6 +97,29 @@ class PaginationDetector(BaseDetector):
             detector=DETECTOR_PAGINATION,
         ))
 
+    def revalidate(self, results: List[dict]) -> bool:
+        if len(results) == 0:
+            return False
+
+        # next link should still exist
+        result = Result(**results[0])
+        next_selector = result.selectors.get('next')
+        next_el = self.graph_loader.soup.select_one(next_selector.selector)
+        if next_el is None or next_el.name != 'a' or not next_el.attrs.get('href'):
+            return False
+
+        # and still be the next link (a positional selector may match another link, e.g. previous on the last
+        # page), as classified by autopager (which is then not run again by a full detection)
+        self._train()
+        if not self.next_url or \
+                transform_url(self.root_url, next_el.attrs.get('href')) != transform_url(self.root_url, self.next_url):
+            return False
+
+        next_selector.node_id = int(next_el.attrs.get('node-id'))
+        self.next_url = next_el.attrs.get('href')
+        self.results = [result]
+        return True
+
     def run(self):
         self._train()
 
@@ -2,26 +2,24 @@ import base64
 import json
 import math
 import time
-from collections import defaultdict
-from typing import List, Set, Dict
+import warnings
+from typing import List, Set, Dict, Optional, Tuple
 from urllib.parse import urljoin
 
 import numpy as np
-import pandas as pd
 from bs4 import BeautifulSoup
-from scipy.sparse import csr_matrix
-from scipy.stats import entropy
-from sklearn.cluster import DBSCAN
-from sklearn.decomposition import PCA
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-from sklearn.preprocessing import normalize
+from scipy.sparse import csr_matrix, hstack
 
+from webspot.constants.clustering_backend import CLUSTERING_BACKEND_DBSCAN
 from webspot.constants.detector import DETECTOR_PLAIN_LIST
 from webspot.constants.field_extract_rule_type import FIELD_EXTRACT_RULE_TYPE_TEXT, FIELD_EXTRACT_RULE_TYPE_LINK_URL, \
     FIELD_EXTRACT_RULE_TYPE_IMAGE_URL
 from webspot.detect.detectors.base import BaseDetector
 from webspot.detect.models.selector import Selector
-from webspot.detect.utils.math import log_positive
+from webspot.detect.utils.clustering import NodeClustering
+from webspot.detect.utils.projection_cache import ProjectionCache, projection_cache as default_projection_cache
+from webspot.detect.utils.url import get_url_domain
+from webspot.detect.utils.math import log_positive, sparse_pca, group_by_label_parent
 from webspot.detect.utils.highlight_html import add_class, add_label
 from webspot.detect.models.list_result import ListResult
 from webspot.graph.graph_loader import GraphLoader
@@ -31,18 +29,30 @@ from webspot.request.html_requester import HtmlRequester
 
 logger = get_logger('webspot.detect.detectors.plain_list')
 
+# fields extract rules (type, attribute), indexed by rule type code
+FIELD_EXTRACT_RULES = [
+    (FIELD_EXTRACT_RULE_TYPE_TEXT, ''),
+    (FIELD_EXTRACT_RULE_TYPE_LINK_URL, 'href'),
+    (FIELD_EXTRACT_RULE_TYPE_IMAGE_URL, 'src'),
+]
+
 
 class PlainListDetector(BaseDetector):
+    result_cls = ListResult
+
     def __init__(
         self,
         dbscan_eps: float = 0.01,
         dbscan_min_samples: int = 5,
         dbscan_metric: str = 'euclidean',
         dbscan_n_jobs: int = -1,
+        dbscan_algorithm: str = 'ball_tree',
+        clustering_backend: str = CLUSTERING_BACKEND_DBSCAN,
         pca_n_components: int = 50,
         entropy_threshold: float = 1e-3,
         score_threshold: float = 1.,
-        sample_item_nodes: int = 10,
+        sample_item_nodes: Optional[int] = None,  # deprecated, fields are mined from all item nodes
+        score_sample_item_nodes: Optional[int] = None,
         min_item_nodes: int = 5,
         node2vec_ratio: float = 10.,
         result_name_prefix: str = 'List',
@@ -52,16 +62,23 @@ class PlainListDetector(BaseDetector):
         min_item_nodes_ratio: float = 0.5,
         max_feature_count: int = 10,
         max_result_count: int = 10,
+        projection_cache: Optional[ProjectionCache] = default_projection_cache,
         *args,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
 
+        if score_sample_item_nodes is not None and score_sample_item_nodes < 1:
+            raise Exception(f'Invalid score_sample_item_nodes: {score_sample_item_nodes}')
+        if sample_item_nodes is not None:
+            warnings.warn('sample_item_nodes is deprecated and ignored, fields are mined from all item nodes',
+                          DeprecationWarning, stacklevel=2)
+
         # settings
         self.pca_n_components = pca_n_components
         self.entropy_threshold = entropy_threshold
         self.score_threshold = score_threshold
-        self.sample_item_nodes = sample_item_nodes
+        self.score_sample_item_nodes = score_sample_item_nodes  # all item nodes are scored if None
         self.min_item_nodes = min_item_nodes
         self.node2vec_ratio = node2vec_ratio
         self.result_name_prefix = result_name_prefix
@@ -71,12 +88,15 @@ class PlainListDetector(BaseDetector):
         self.min_item_nodes_ratio = min_item_nodes_ratio
         self.max_feature_count = max_feature_count
         self.max_result_count = max_result_count
+        self.projection_cache = projection_cache
 
-        # dbscan model
-        self.dbscan = DBSCAN(
-            metric=dbscan_metric,
+        # clustering of nodes (dbscan by default)
+        self.clustering = NodeClustering(
+            backend=clustering_backend,
             eps=dbscan_eps,
             min_samples=dbscan_min_samples,
+            metric=dbscan_metric,
+            algorithm=dbscan_algorithm,
             n_jobs=dbscan_n_jobs,
         )
 
@@ -91,8 +111,7 @@ class PlainListDetector(BaseDetector):
     def url(self):
         return self.html_requester.url
 
-    def highlight_html(self, html: str, **kwargs) -> str:
-        soup = BeautifulSoup(html, 'html.parser')
+    def highlight_soup(self, soup: BeautifulSoup, **kwargs):
         for i, result in enumerate(self.results):
             # list
             list_selector = result.selectors.get('list')
@@ -119,7 +138,6 @@ class PlainListDetector(BaseDetector):
                     for field_el in field_els:
                         add_class(field_el, ['webspot-highlight-container', 'webspot-highlight-node-color__green'])
                         # _add_label(field_el, soup, f'Field {k + 1}', 'success')
-        return str(soup)
 
     @property
     def html(self):
@@ -134,20 +152,19 @@ class PlainListDetector(BaseDetector):
         return base64.b64encode(json.dumps(self.results).encode('utf-8')).decode('utf-8')
 
     @property
-    def pruned_nodes_features(self):
-        features = self.graph_loader.nodes_features_tensor.detach().numpy()
-        features_count = features.sum(axis=0)
-        features_idx = np.argwhere(features_count > 1).T[0]
-        return features[:, features_idx]
+    def pruned_nodes_features(self) -> csr_matrix:
+        return self.graph_loader.pruned_nodes_features
 
     def _get_nodes_features_tags_attrs(self, nodes_idx: np.ndarray = None):
         """
         nodes features (tags + attributes)
         """
+        from sklearn.preprocessing import normalize
+
         if nodes_idx is None:
             features = self.pruned_nodes_features
         else:
-            features = self.pruned_nodes_features[nodes_idx].sum(axis=1)
+            features = self.pruned_nodes_features[nodes_idx.T[0]]
 
         return normalize(
             features,
@@ -159,12 +176,15 @@ class PlainListDetector(BaseDetector):
         """
         nodes features (node2vec)
         """
+        from sklearn.preprocessing import normalize
+
         if nodes_idx is None:
-            embedded_tensor = self.graph_loader.nodes_embedded_tensor
+            walks_incidence = self.graph_loader.nodes_walks_incidence_mat
         else:
-            embedded_tensor = self.graph_loader.nodes_embedded_tensor[nodes_idx.T[0]]
+            walks_incidence = self.graph_loader.nodes_walks_incidence_mat[nodes_idx.T[0]]
 
-        embedded_features = self.pruned_nodes_features[embedded_tensor].sum(axis=1)
+        # sum of features of the nodes visited in each walk
+        embedded_features = walks_incidence @ self.pruned_nodes_features
 
         return normalize(
             embedded_features,
@@ -172,27 +192,52 @@ class PlainListDetector(BaseDetector):
             axis=1,
         )
 
+    def _get_nodes_features_columns(self) -> List[str]:
+        """
+        names of the columns of nodes features (tags + attributes, then node2vec)
+        """
+        names = [self.graph_loader.nodes_features_names[i] for i in self.graph_loader.pruned_features_idx]
+        return names + [f'node2vec:{name}' for name in names]
+
+    def _get_projection_key(self) -> Tuple[Optional[str], str]:
+        """
+        key of the projection basis: domain of the page (if known) and its template
+        """
+        url = self.html_requester.url if self.html_requester is not None else None
+        return get_url_domain(url) if url else None, self.graph_loader.template_fingerprint
+
     def _get_nodes_features(self, nodes_idx: np.ndarray = None, to_sparse: bool = False):
         """
         nodes features (tags + attributes + node2vec)
         """
+        from sklearn.preprocessing import normalize
+
         x1 = self._get_nodes_features_tags_attrs(nodes_idx)
         x2 = self._get_nodes_features_node2vec(nodes_idx) * self.node2vec_ratio
         x = normalize(
-            np.concatenate(
+            hstack(
                 (x1, x2),
-                axis=1,
+                format='csr',
             ),
             norm='l2',
             axis=1,
         )
-        logger.debug(f'nodes features size: {x.shape}')
-
-        if x.shape[1] > self.pca_n_components:
-            x = PCA(
+        logger.debug(f'nodes features size: {x.shape} (nnz: {x.nnz})')
+
+        # reduce dimensions on the sparse matrix, densify only the reduced one
+        if x.shape[1] <= self.pca_n_components:
+            x = x.toarray()
+        elif nodes_idx is None and x.shape[0] >= self.pca_n_components and \
+                self.projection_cache is not None and self.projection_cache.enabled:
+            # projection onto the (cached) basis of the site
+            x = self.projection_cache.transform(
+                key=self._get_projection_key(),
+                x=x,
+                columns=self._get_nodes_features_columns(),
                 n_components=self.pca_n_components,
-                svd_solver='randomized',
-            ).fit_transform(x)
+            )
+        else:
+            x = sparse_pca(x, n_components=self.pca_n_components)
 
         if to_sparse:
             return csr_matrix(x)
@@ -200,59 +245,111 @@ class PlainListDetector(BaseDetector):
             return x
 
     def _extract_fields_by_id(self, list_id: int, item_nodes: List[Node]) -> List[Selector]:
+        """
+        Fields extract rules (css selector path relative to the list, type, attribute) mined from all items
+        of the list in a single pass, kept if found in at least `min_item_nodes_ratio` of the items.
+        """
+        graph_loader = self.graph_loader
+
+        # items (list child nodes with the tag of item nodes)
+        items_idx = np.array([
+            graph_loader.nodes_id_to_idx_vec[c.id]
+            for c in graph_loader.get_node_children_by_id(list_id)
+            if c.tag == item_nodes[0].tag
+        ], dtype=np.int64)
+        if len(items_idx) == 0:
+            return []
+
+        # descendants of all items within the depth limit (subtree ranges in preorder)
+        starts = items_idx + 1
+        lengths = graph_loader.nodes_subtree_end_vec[items_idx] - starts
+        desc_item_vec = np.repeat(np.arange(len(items_idx)), lengths)
+        desc_idx_vec = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        desc_items_idx = items_idx[desc_item_vec]
+        mask = (graph_loader.nodes_root_idx_vec[desc_idx_vec] == graph_loader.nodes_root_idx_vec[desc_items_idx]) & \
+               (graph_loader.nodes_depth_vec[desc_idx_vec] <= graph_loader.nodes_depth_vec[desc_items_idx] +
+                graph_loader.dfs_depth)
+        desc_item_vec = desc_item_vec[mask]
+        desc_idx_vec = desc_idx_vec[mask]
+
+        # interned paths (parent path code, css selector repr) -> path code, relative to the list
+        paths: Dict[Tuple[int, str], int] = {}
+        nodes_path_code_vec = np.full(len(graph_loader.nodes_), -1, dtype=np.int64)
+
+        def _intern_path(parent_code: int, node: Node) -> int:
+            key = (parent_code, graph_loader.get_node_css_selector_repr(node, numbered=False, no_id=True))
+            return paths.setdefault(key, len(paths))
+
+        for idx in items_idx.tolist():
+            nodes_path_code_vec[idx] = _intern_path(-1, graph_loader.nodes_[idx])
+
+        # extract rules found in each descendant (parents come before their children in preorder)
+        rules_desc = []
+        rules_path_code = []
+        rules_type = []
+        for i, idx in enumerate(desc_idx_vec.tolist()):
+            n = graph_loader.nodes_[idx]
+            path_code = nodes_path_code_vec[idx] = _intern_path(
+                nodes_path_code_vec[graph_loader.nodes_parent_idx_vec[idx]], n)
+
+            # extract text
+            if n.text is not None and len(n.text.strip()) > 0:
+                rules_desc.append(i)
+                rules_path_code.append(path_code)
+                rules_type.append(0)
+
+            # extract link
+            if n.tag == 'a' and len((n.attrs.get('href') or '').strip()) > 0:
+                rules_desc.append(i)
+                rules_path_code.append(path_code)
+                rules_type.append(1)
+
+            # extract image url
+            if n.tag == 'img' and len((n.attrs.get('src') or '').strip()) > 0:
+                rules_desc.append(i)
+                rules_path_code.append(path_code)
+                rules_type.append(2)
+
+        if len(rules_desc) == 0:
+            return []
+
+        # rule codes (path code, type)
+        rules_desc = np.array(rules_desc, dtype=np.int64)
+        rules_vec = np.array(rules_path_code, dtype=np.int64) * len(FIELD_EXTRACT_RULES) + np.array(rules_type)
+        rules_item_vec = desc_item_vec[rules_desc]
+
+        # support of each rule (number of items where it is found)
+        n_rules = len(paths) * len(FIELD_EXTRACT_RULES)
+        items_rules = np.unique(rules_item_vec * n_rules + rules_vec)
+        support_vec = np.bincount(items_rules % n_rules, minlength=n_rules)
+
+        # rules by first appearance (items in order, descendants grouped by parent, as in a traversal of items)
+        rules_idx_vec = desc_idx_vec[rules_desc]
+        order = np.lexsort((rules_idx_vec, graph_loader.nodes_parent_idx_vec[rules_idx_vec], rules_item_vec))
+        unique_rules, first_pos = np.unique(rules_vec[order], return_index=True)
+        unique_rules = unique_rules[np.argsort(first_pos)]
+
+        # css selector paths of path codes
+        paths_list = list(paths.keys())
+
+        def _get_path(path_code: int) -> str:
+            reprs = []
+            while path_code != -1:
+                path_code, css_selector_repr = paths_list[path_code]
+                reprs.append(css_selector_repr)
+            return ' > '.join(reversed(reprs))
+
         # fields
         fields: List[Selector] = []
-
-        # extract rules dict (css selector path, type, attribute)
-        fields_extract_rules_dict: Dict[(str, str), int] = defaultdict(int)
-
-        # list child nodes
-        list_child_nodes = self.graph_loader.get_node_children_by_id(list_id)
-
-        # iterate list child nodes
-        i = 0
-        for c in np.random.choice(list_child_nodes, self.sample_item_nodes):
-            if c.tag != item_nodes[0].tag:
+        for i, rule in enumerate(unique_rules.tolist()):
+            if support_vec[rule] / len(items_idx) < self.min_item_nodes_ratio:
                 continue
-
-            # stop if item nodes samples reached
-            if i == self.min_item_nodes:
-                break
-
-            # item child nodes
-            item_child_nodes = self.graph_loader.get_node_children_recursive_by_id(c.id)
-
-            # iterate item child nodes
-            for n in item_child_nodes:
-                # extract text
-                if n.text is not None and len(n.text.strip()) > 0:
-                    extract_rule_css = self.graph_loader.get_node_css_selector_path(node=n, root_id=list_id,
-                                                                                    numbered=False, no_id=True)
-                    fields_extract_rules_dict[(extract_rule_css, FIELD_EXTRACT_RULE_TYPE_TEXT, '')] += 1
-
-                # extract link
-                if n.tag == 'a' and n.attrs.get('href') is not None and len(n.attrs.get('href').strip()) > 0:
-                    extract_rule_css = self.graph_loader.get_node_css_selector_path(node=n, root_id=list_id,
-                                                                                    numbered=False, no_id=True)
-                    fields_extract_rules_dict[(extract_rule_css, FIELD_EXTRACT_RULE_TYPE_LINK_URL, 'href')] += 1
-
-                # extract image url
-                if n.tag == 'img' and n.attrs.get('src') is not None and len(n.attrs.get('src').strip()) > 0:
-                    extract_rule_css = self.graph_loader.get_node_css_selector_path(node=n, root_id=list_id,
-                                                                                    numbered=False, no_id=True)
-                    fields_extract_rules_dict[(extract_rule_css, FIELD_EXTRACT_RULE_TYPE_IMAGE_URL, 'src')] += 1
-
-            i += 1
-
-        for i, (item, count) in enumerate(fields_extract_rules_dict.items()):
-            if float(count) / self.min_item_nodes < self.min_item_nodes_ratio:
-                continue
-            extract_rule_css, type_, attribute = item
-            name = f'Field_{type_}_{i + 1}'
+            path_code, type_ = divmod(rule, len(FIELD_EXTRACT_RULES))
+            rule_type, attribute = FIELD_EXTRACT_RULES[type_]
             fields.append(Selector(
-                name=name,
-                selector=extract_rule_css,
-                type=type_,
+                name=f'Field_{rule_type}_{i + 1}',
+                selector=_get_path(path_code),
+                type=rule_type,
                 attribute=attribute,
             ))
         return fields
@@ -278,54 +375,65 @@ class PlainListDetector(BaseDetector):
             data.append(row)
         return data
 
+    def revalidate(self, results: List[dict]) -> bool:
+        soup = self.graph_loader.soup
+        revalidated = []
+        for r in results:
+            result = ListResult(**r)
+
+            # list should still exist
+            list_selector = result.selectors.get('list')
+            list_el = soup.select_one(list_selector.selector)
+            if list_el is None:
+                continue
+
+            # items should still be enough
+            data = self._extract_data(soup, result.selectors.get('full_items').selector, result.fields)
+            if len(data) < self.min_item_nodes:
+                continue
+
+            # each field should still be found in enough items
+            if any(sum(f.name in row for row in data) / len(data) < self.min_item_nodes_ratio
+                   for f in result.fields):
+                continue
+
+            list_selector.node_id = int(list_el.attrs.get('node-id'))
+            result.data = data
+            revalidated.append(result)
+
+        if len(revalidated) == 0:
+            return False
+
+        self.results = revalidated
+        return True
+
     def _train(self):
-        self.dbscan.fit(self._get_nodes_features(to_sparse=True))
+        # dense features, so that a tree-based neighbors index can be used
+        self.clustering.fit(self._get_nodes_features())
+        logger.debug(f'clustering: {self.clustering.dict()}')
 
     def _pre_filter(self) -> (List[Node], List[List[Node]]):
-        df_nodes = pd.DataFrame({
-            'id': [n.id for n in self.graph_loader.nodes_],
-            'parent_id': [n.parent_id for n in self.graph_loader.nodes_],
-            'label': self.dbscan.labels_,
-        })
-        df_nodes_filtered = df_nodes[df_nodes.label != -1]
-        logger.debug('nodes before pre-filter: %s' % df_nodes.shape[0])
-        logger.debug('nodes after pre-filter: %s' % df_nodes_filtered.shape[0])
-
-        df_labels = df_nodes_filtered \
-            .groupby('label')[['parent_id']] \
-            .agg(lambda s: entropy(s.value_counts())) \
-            .rename(columns={'parent_id': 'entropy'}) \
-            .sort_values(by='entropy', ascending=True)
-
-        # threshold_mask = df_labels.entropy < self.entropy_threshold
-        # df_labels_filtered = df_labels[threshold_mask]
+        labels_vec = self.clustering.labels_
+        logger.debug('nodes before pre-filter: %s' % len(labels_vec))
+        logger.debug('nodes after pre-filter: %s' % np.count_nonzero(labels_vec != -1))
+
+        # candidate item nodes grouped by (label, parent), labels ordered by entropy of parents
+        groups_idx = group_by_label_parent(
+            labels_vec=labels_vec,
+            parent_ids_vec=self.graph_loader.nodes_parent_ids_vec,
+            min_group_size=self.min_item_nodes,
+        )
 
         item_nodes_list = []
         list_node_list = []
-        for label in df_labels.index:
-            # item nodes (filtered by label only)
-            df_nodes_filtered_by_label = df_nodes_filtered[df_nodes_filtered.label == label]
-
-            # iterate parent id
-            for parent_id in df_nodes_filtered_by_label.parent_id.unique().tolist():
-                # item nodes (further filtered parent id)
-                df_nodes_filtered_by_label_parent_id = df_nodes_filtered_by_label[
-                    df_nodes_filtered.parent_id == parent_id]
-
-                # skip if item nodes count is less than required
-                if df_nodes_filtered_by_label_parent_id.shape[0] < self.min_item_nodes:
-                    continue
-
-                # item node ids
-                item_nodes_ids = df_nodes_filtered_by_label_parent_id.id.values
-
-                # item nodes
-                item_nodes = self.graph_loader.get_nodes_by_ids(item_nodes_ids)
-                item_nodes_list.append(item_nodes)
+        for group_idx in groups_idx:
+            # item nodes
+            item_nodes = [self.graph_loader.nodes_[i] for i in group_idx]
+            item_nodes_list.append(item_nodes)
 
-                # list node
-                list_node = self.graph_loader.get_node_by_id(item_nodes[0].parent_id)
-                list_node_list.append(list_node)
+            # list node
+            list_node = self.graph_loader.get_node_by_id(item_nodes[0].parent_id)
+            list_node_list.append(list_node)
 
         return list_node_list, item_nodes_list
 
@@ -334,62 +442,80 @@ class PlainListDetector(BaseDetector):
         list_node_list: List[Node],
         item_nodes_list: List[List[Node]],
     ) -> (List[Node], List[List[Node]], List[float], List[Dict[str, float]]):
+        if len(item_nodes_list) == 0:
+            return [], [], [], []
+
+        # scored item nodes of each candidate (all, or a sample)
+        items_idx_list = []
+        for item_nodes in item_nodes_list:
+            items_idx = self.graph_loader.nodes_id_to_idx_vec[np.array([n.id for n in item_nodes], dtype=np.int64)]
+            if self.score_sample_item_nodes is not None and len(items_idx) > self.score_sample_item_nodes:
+                items_idx = np.sort(self.graph_loader.rng.choice(items_idx, self.score_sample_item_nodes,
+                                                                 replace=False))
+            items_idx_list.append(items_idx)
+        items_idx = np.concatenate(items_idx_list)
+        items_count_vec = np.array([len(idx) for idx in items_idx_list], dtype=np.int64)
+
+        # scores of all items at once (zero if without descendants)
+        text_length_vec, text_count_vec, has_descendants_vec = \
+            self.graph_loader.get_nodes_descendants_text_stats(items_idx)
+        items_text_richness_vec = np.where(
+            has_descendants_vec,
+            np.log(np.minimum(text_length_vec, self.max_text_length) * self.text_length_discount + 1),
+            0.,
+        )
+        items_complexity_vec = np.where(
+            has_descendants_vec,
+            np.log(np.minimum(text_count_vec, self.max_feature_count) + 1),
+            0.,
+        )
+
+        # best item of each candidate (zero if without items, as reduceat does not support empty segments)
+        text_richness_vec = np.zeros(len(items_idx_list))
+        complexity_vec = np.zeros(len(items_idx_list))
+        has_items_vec = items_count_vec > 0
+        if has_items_vec.any():
+            offsets = (np.cumsum(items_count_vec) - items_count_vec)[has_items_vec]
+            text_richness_vec[has_items_vec] = np.maximum.reduceat(items_text_richness_vec, offsets)
+            complexity_vec[has_items_vec] = np.maximum.reduceat(items_complexity_vec, offsets)
+
         score_list = []
         scores_list = []
         idx: List[int] = []
-        for i, list_node, item_nodes in zip(range(len(list_node_list)), list_node_list, item_nodes_list):
-            nodes_ids = np.random.choice(np.array([n.id for n in item_nodes]), size=10)
-            try:
-                score_text_richness = 0
-                score_complexity = 0
-                for node_id in nodes_ids:
-                    child_nodes_idx = self.graph_loader.get_node_children_idx_recursive_by_id(node_id)
-                    if len(child_nodes_idx) == 0:
-                        continue
-                    nodes_text_length_vec = self.graph_loader.nodes_text_length_vec[child_nodes_idx]
-                    nodes_text_length_vec_non_zero = nodes_text_length_vec[nodes_text_length_vec > 0]
-                    _score_text_richness = log_positive(
-                        min(nodes_text_length_vec_non_zero.sum(), self.max_text_length) * self.text_length_discount)
-                    _score_complexity = log_positive(min(len(nodes_text_length_vec_non_zero), self.max_feature_count))
-                    if _score_text_richness > score_text_richness:
-                        score_text_richness = _score_text_richness
-                    if _score_complexity > score_complexity:
-                        score_complexity = _score_complexity
-                score_item_count = log_positive(min(len(item_nodes), self.max_item_count))
-
-                logger.debug(f'score_text_richness: {score_text_richness}')
-                logger.debug(f'score_complexity: {score_complexity}')
-                logger.debug(f'score_item_count: {score_item_count}')
-
-                # score
-                # score = score_text_richness + score_complexity + score_item_count
-                score = score_text_richness + score_item_count
-                logger.debug(f'score: {score}')
-
-                # skip score less than threshold
-                if score < self.score_threshold:
-                    continue
-
-                # skip zero sub-score
-                if score_text_richness == 0 or score_complexity == 0 or score_item_count == 0:
-                    continue
+        for i, item_nodes in enumerate(item_nodes_list):
+            score_text_richness = float(text_richness_vec[i])
+            score_complexity = float(complexity_vec[i])
+            score_item_count = log_positive(min(len(item_nodes), self.max_item_count))
+
+            logger.debug(f'score_text_richness: {score_text_richness}')
+            logger.debug(f'score_complexity: {score_complexity}')
+            logger.debug(f'score_item_count: {score_item_count}')
+
+            # score
+            # score = score_text_richness + score_complexity + score_item_count
+            score = score_text_richness + score_item_count
+            logger.debug(f'score: {score}')
+
+            # skip score less than threshold
+            if score < self.score_threshold:
+                continue
 
-                # add to scores list
-                scores_list.append({
-                    'text_richness': score_text_richness,
-                    'complexity': score_complexity,
-                    'item_count': score_item_count,
-                })
+            # skip zero sub-score
+            if score_text_richness == 0 or score_complexity == 0 or score_item_count == 0:
+                continue
 
-                # add to score list
-                score_list.append(score)
+            # add to scores list
+            scores_list.append({
+                'text_richness': score_text_richness,
+                'complexity': score_complexity,
+                'item_count': score_item_count,
+            })
 
-                # add to idx
-                idx.append(i)
+            # add to score list
+            score_list.append(score)
 
-            except ValueError as e:
-                # logging.warning(f'ValueError: {e}')
-                pass
+            # add to idx
+            idx.append(i)
 
         res_list_node_list = [list_node_list[i] for i in idx]
         res_item_nodes_list = [item_nodes_list[i] for i in idx]
@@ -403,8 +529,8 @@ class PlainListDetector(BaseDetector):
         score_list: List[float],
         scores_list: List[Dict[str, float]],
     ) -> List[ListResult]:
-        # soup
-        soup = BeautifulSoup(self._html, features='lxml')
+        # soup (shared parsed document, read-only)
+        soup = self.graph_loader.soup
 
         # results
         results = []
@@ -517,6 +643,7 @@ class PlainListDetector(BaseDetector):
 
         toc = time.time()
         logger.debug(f'PlainListExtractor: {toc - tic:.2f}s')
+        logger.debug(f'css selector cache: {self.graph_loader.css_selector_cache_info}')
 
         return self.results
 
@@ -525,7 +652,10 @@ def run_plain_list_detector(url: str, method: str = None) -> PlainListDetector:
     html_requester = HtmlRequester(url=url, request_method=method)
     html_requester.run()
 
-    graph_loader = GraphLoader(html=html_requester.html_, json_data=html_requester.json_data)
+    graph_loader = GraphLoader(
+        html=html_requester.html_,
+        document=html_requester.document,
+    )
     graph_loader.run()
 
     plain_list_detector = PlainListDetector(html_requester=html_requester, graph_loader=graph_loader)
@@ -11,7 +11,7 @@ class PlainTableDetector(BaseDetector):
         # data
         self._table_nodes = None
 
-    def highlight_html(self, html: str, **kwargs) -> str:
+    def highlight_soup(self, soup: BeautifulSoup, **kwargs):
         pass
 
     @property
@@ -0,0 +1,158 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from webspot.constants.clustering_backend import CLUSTERING_BACKEND_DBSCAN, CLUSTERING_BACKEND_HDBSCAN, \
+    CLUSTERING_BACKEND_GRID, ALL_CLUSTERING_BACKENDS
+from webspot.logging import get_logger
+
+logger = get_logger('webspot.detect.utils.clustering')
+
+
+def collapse_duplicate_rows(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Unique rows of x, the index of the unique row of each row, and the number of rows of each unique row.
+    """
+    unique_x, inverse_vec, counts_vec = np.unique(x, axis=0, return_inverse=True, return_counts=True)
+    return unique_x, inverse_vec.ravel(), counts_vec
+
+
+def get_canonical_labels(labels_vec: np.ndarray, core_mask_vec: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Cluster labels numbered by order of the first core sample (or first sample, if no core mask is given)
+    of each cluster, as DBSCAN numbers them, so that labels do not depend on the order rows were clustered in.
+    Noise (-1) is kept as is.
+    """
+    labels_vec = np.asarray(labels_vec)
+    mask_vec = labels_vec != -1
+    if core_mask_vec is not None:
+        mask_vec &= core_mask_vec
+    if not mask_vec.any():
+        return np.full(len(labels_vec), -1, dtype=np.int64)
+
+    # first (core) sample of each cluster
+    unique_labels, first_idx = np.unique(labels_vec[mask_vec], return_index=True)
+    order = np.argsort(np.flatnonzero(mask_vec)[first_idx], kind='stable')
+
+    # map of old to new labels (clusters without core samples become noise)
+    label_map = np.full(labels_vec.max() + 2, -1, dtype=np.int64)
+    label_map[unique_labels[order]] = np.arange(len(unique_labels))
+    return label_map[labels_vec]
+
+
+class NodeClustering(object):
+    """
+    Clustering of nodes features.
+
+    Exact duplicated rows (most items of a list have the same features) are collapsed and clustered once,
+    weighted by their count. Backends:
+
+    - dbscan: DBSCAN with a tree-based neighbors index on the unique rows (same labels as DBSCAN on all rows)
+    - hdbscan: HDBSCAN (sklearn >= 1.3) on all rows, `min_samples` being the minimum cluster size
+    - grid: rows hashed to a grid of cells of diagonal `eps`, cells with at least `min_samples` rows being
+      clusters; an approximation of DBSCAN for tiny `eps`, where neighboring cells are not merged
+    """
+
+    def __init__(
+        self,
+        backend: str = CLUSTERING_BACKEND_DBSCAN,
+        eps: float = 0.01,
+        min_samples: int = 5,
+        metric: str = 'euclidean',
+        algorithm: str = 'ball_tree',
+        n_jobs: Optional[int] = -1,
+        collapse_duplicates: bool = True,
+    ):
+        if backend not in ALL_CLUSTERING_BACKENDS:
+            raise Exception(f'Invalid clustering backend: {backend}')
+
+        # settings
+        self.backend = backend
+        self.eps = eps
+        self.min_samples = min_samples
+        self.metric = metric
+        self.algorithm = algorithm
+        self.n_jobs = n_jobs
+        self.collapse_duplicates = collapse_duplicates
+
+        # data
+        self.labels_: Optional[np.ndarray] = None
+        self.n_samples = 0
+        self.n_unique_samples = 0
+
+    def fit(self, x: np.ndarray):
+        x = np.asarray(x)
+        self.n_samples = x.shape[0]
+
+        # collapse duplicated rows
+        if self.collapse_duplicates and self.backend != CLUSTERING_BACKEND_HDBSCAN:
+            unique_x, inverse_vec, counts_vec = collapse_duplicate_rows(x)
+        else:
+            unique_x, inverse_vec, counts_vec = x, np.arange(self.n_samples), np.ones(self.n_samples, dtype=np.int64)
+        self.n_unique_samples = unique_x.shape[0]
+        logger.debug(f'clustering {self.n_samples} samples ({self.n_unique_samples} unique) with {self.backend}')
+
+        # cluster unique rows
+        if self.backend == CLUSTERING_BACKEND_DBSCAN:
+            labels_vec, core_mask_vec = self._fit_dbscan(unique_x, counts_vec)
+        elif self.backend == CLUSTERING_BACKEND_HDBSCAN:
+            labels_vec, core_mask_vec = self._fit_hdbscan(unique_x)
+        elif self.backend == CLUSTERING_BACKEND_GRID:
+            labels_vec, core_mask_vec = self._fit_grid(unique_x, counts_vec)
+        else:
+            raise Exception(f'Invalid clustering backend: {self.backend}')
+
+        # labels of all rows
+        self.labels_ = get_canonical_labels(
+            labels_vec[inverse_vec],
+            core_mask_vec[inverse_vec] if core_mask_vec is not None else None,
+        ) if self.n_samples > 0 else np.array([], dtype=np.int64)
+        return self
+
+    def _fit_dbscan(self, x: np.ndarray, sample_weight: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        from sklearn.cluster import DBSCAN
+        dbscan = DBSCAN(
+            eps=self.eps,
+            min_samples=self.min_samples,
+            metric=self.metric,
+            algorithm=self.algorithm,
+            n_jobs=self.n_jobs,
+        )
+        dbscan.fit(x, sample_weight=sample_weight)
+        core_mask_vec = np.zeros(x.shape[0], dtype=bool)
+        core_mask_vec[dbscan.core_sample_indices_] = True
+        return dbscan.labels_, core_mask_vec
+
+    def _fit_hdbscan(self, x: np.ndarray) -> Tuple[np.ndarray, None]:
+        try:
+            from sklearn.cluster import HDBSCAN
+        except ImportError:
+            raise Exception('HDBSCAN clustering backend requires scikit-learn >= 1.3')
+        hdbscan = HDBSCAN(
+            min_cluster_size=max(self.min_samples, 2),
+            metric=self.metric,
+            algorithm='auto' if self.algorithm == 'brute' else self.algorithm,
+            n_jobs=self.n_jobs,
+        )
+        hdbscan.fit(x)
+        return hdbscan.labels_, None
+
+    def _fit_grid(self, x: np.ndarray, sample_weight: np.ndarray) -> Tuple[np.ndarray, None]:
+        # cells of side eps / sqrt(d), so that rows of a cell are within eps of each other
+        cell_size = self.eps / np.sqrt(max(x.shape[1], 1))
+        cells = np.floor(x / cell_size).astype(np.int64)
+        _, cells_idx = np.unique(cells, axis=0, return_inverse=True)
+        cells_idx = cells_idx.ravel()
+
+        # cells with enough rows are clusters, others are noise
+        cells_weight = np.bincount(cells_idx, weights=sample_weight)
+        labels_vec = np.where(cells_weight[cells_idx] >= self.min_samples, cells_idx, -1)
+        return labels_vec, None
+
+    def dict(self) -> dict:
+        return {
+            'backend': self.backend,
+            'samples': self.n_samples,
+            'unique_samples': self.n_unique_samples,
+            'clusters': int(self.labels_.max(initial=-1)) + 1 if self.labels_ is not None else 0,
+        }
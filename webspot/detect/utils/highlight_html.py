@@ -27,19 +27,32 @@ def embed_highlight(html: str) -> str:
     # soup
     soup = BeautifulSoup(html, 'html.parser')
 
+    # embed
+    embed_highlight_soup(soup)
+
+    # html
+    return str(soup)
+
+
+def embed_highlight_soup(soup: BeautifulSoup):
     # css
     style_el = soup.new_tag('style')
     style_el.append(get_embed_highlight_css())
     soup.select_one('head').append(style_el)
 
-    # html
-    return str(soup)
-
 
 def embed_annotate(html: str) -> str:
     # soup
     soup = BeautifulSoup(html, 'html.parser')
 
+    # embed
+    embed_annotate_soup(soup)
+
+    # html
+    return str(soup)
+
+
+def embed_annotate_soup(soup: BeautifulSoup):
     # css
     style_el = soup.new_tag('style')
     style_el.append(get_embed_annotate_css())
@@ -55,9 +68,6 @@ def embed_annotate(html: str) -> str:
     for a_el in soup.select('a'):
         a_el.attrs['href'] = 'javascript:'
 
-    # html
-    return str(soup)
-
 
 def _add_class(el: Tag, classes: List[str]):
     if not el:
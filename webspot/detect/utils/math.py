@@ -1,4 +1,7 @@
+from typing import List, Optional
+
 import numpy as np
+from scipy.sparse import csr_matrix, spmatrix
 
 
 def sigmoid(x):
@@ -7,3 +10,107 @@ def sigmoid(x):
 
 def log_positive(x) -> float:
     return float(np.log(x + 1))
+
+
+def sparse_pca(
+    x: spmatrix,
+    n_components: int,
+    n_oversamples: int = 10,
+    n_iter: Optional[int] = None,
+    random_state: int = 0,
+    return_components: bool = False,
+):
+    """
+    PCA projection (as in PCA(svd_solver='randomized').fit_transform) of a sparse
+    matrix without densifying it. Columns are centered implicitly in the matrix
+    products, so memory stays proportional to the non-zero count plus
+    (n_samples + n_features) x n_components.
+
+    If `return_components`, the components (n_components x n_features), singular
+    values and mean of columns are returned as well.
+    """
+    x = csr_matrix(x, dtype=np.float64)
+    n_samples, n_features = x.shape
+    n_components = min(n_components, n_samples, n_features)
+    n_random = min(n_components + n_oversamples, n_samples, n_features)
+    if n_iter is None:
+        # same as n_iter='auto' in sklearn's randomized svd
+        n_iter = 7 if n_components < .1 * min(n_samples, n_features) else 4
+    mean = np.asarray(x.mean(axis=0)).ravel()
+
+    def _dot(m: np.ndarray) -> np.ndarray:
+        # (x - mean) @ m
+        return x @ m - mean @ m
+
+    def _rdot(m: np.ndarray) -> np.ndarray:
+        # (x - mean).T @ m
+        return x.T @ m - np.outer(mean, m.sum(axis=0))
+
+    # randomized range finder with power iterations
+    rng = np.random.RandomState(random_state)
+    q, _ = np.linalg.qr(_dot(rng.normal(size=(n_features, n_random))))
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(_rdot(q))
+        q, _ = np.linalg.qr(_dot(q))
+
+    # svd of the projected matrix
+    u, s, vt = np.linalg.svd(_rdot(q).T, full_matrices=False)
+    u = q @ u[:, :n_components]
+    s = s[:n_components]
+
+    # deterministic signs (largest absolute value of each component positive)
+    signs = np.sign(u[np.argmax(np.abs(u), axis=0), np.arange(u.shape[1])])
+    signs[signs == 0] = 1
+
+    if return_components:
+        return u * s * signs, vt[:n_components] * signs[:, np.newaxis], s, mean
+    return u * s * signs
+
+
+def group_by_label_parent(
+    labels_vec: np.ndarray,
+    parent_ids_vec: np.ndarray,
+    min_group_size: int = 1,
+) -> List[np.ndarray]:
+    """
+    Indexes of nodes grouped by (cluster label, parent id) in a single sort, skipping noise (label -1)
+    and groups smaller than `min_group_size`.
+
+    Groups are ordered by the entropy of the parent ids of their label (ascending, ties broken by label),
+    then by first appearance of the parent within the label. Indexes within a group are ascending.
+    """
+    idx = np.flatnonzero(labels_vec != -1)
+    if len(idx) == 0:
+        return []
+
+    # sort by (label, parent), stable so that indexes stay ascending within groups
+    order = np.lexsort((parent_ids_vec[idx], labels_vec[idx]))
+    idx = idx[order]
+    labels = labels_vec[idx]
+    parent_ids = parent_ids_vec[idx]
+
+    # groups of (label, parent)
+    is_group_start = np.ones(len(idx), dtype=bool)
+    is_group_start[1:] = (labels[1:] != labels[:-1]) | (parent_ids[1:] != parent_ids[:-1])
+    group_starts = np.flatnonzero(is_group_start)
+    group_sizes = np.diff(np.append(group_starts, len(idx)))
+    group_first_idx = idx[group_starts]
+    _, group_label_idx = np.unique(labels[group_starts], return_inverse=True)
+    group_label_idx = group_label_idx.ravel()
+
+    # entropy of parent ids of each label (summed in descending count order, as value counts are,
+    # so that labels with the same parent distribution get exactly the same entropy)
+    label_sizes = np.bincount(group_label_idx, weights=group_sizes)
+    entropy_order = np.lexsort((-group_sizes, group_label_idx))
+    p = group_sizes[entropy_order] / label_sizes[group_label_idx[entropy_order]]
+    label_entropy = np.bincount(group_label_idx[entropy_order], weights=-p * np.log(p))
+
+    # rank of labels by entropy (unique labels are sorted, so ties are broken by label)
+    label_rank = np.empty(len(label_entropy), dtype=np.int64)
+    label_rank[np.argsort(label_entropy, kind='stable')] = np.arange(len(label_entropy))
+
+    # groups by label rank, then first appearance of parent
+    group_order = np.lexsort((group_first_idx, label_rank[group_label_idx]))
+    group_order = group_order[group_sizes[group_order] >= min_group_size]
+
+    return [idx[group_starts[i]:group_starts[i] + group_sizes[i]] for i in group_order]
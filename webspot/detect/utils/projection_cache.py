@@ -0,0 +1,203 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from webspot.detect.utils.math import sparse_pca
+from webspot.logging import get_logger
+from webspot.utils.cache import CacheStats
+
+logger = get_logger('webspot.detect.utils.projection_cache')
+
+# disabled by default: projections of a page then depend on pages of the same site and template seen before
+PROJECTION_CACHE_SIZE = int(os.environ.get('WEBSPOT_PROJECTION_CACHE_SIZE', 0))
+PROJECTION_MAX_DRIFT = float(os.environ.get('WEBSPOT_PROJECTION_MAX_DRIFT', 0.1))
+PROJECTION_MIN_UPDATE_DRIFT = float(os.environ.get('WEBSPOT_PROJECTION_MIN_UPDATE_DRIFT', 0.02))
+PROJECTION_UPDATE_SIZE = int(os.environ.get('WEBSPOT_PROJECTION_UPDATE_SIZE', 128))
+
+# (domain, template fingerprint), n components
+ProjectionKey = Tuple[Tuple[Optional[str], str], int]
+
+
+def get_explained_variance_ratio(x: csr_matrix, projected_x: np.ndarray) -> float:
+    """Ratio of the variance of the rows of x (around their mean) kept by their projection."""
+    n = x.shape[0]
+    total_var = x.multiply(x).sum() - n * np.square(np.asarray(x.mean(axis=0)).ravel()).sum()
+    if total_var <= 0:
+        return 1.
+    explained_var = np.square(projected_x).sum() - n * np.square(projected_x.mean(axis=0)).sum()
+    return float(explained_var / total_var)
+
+
+class ProjectionBasis(object):
+    """
+    PCA basis (fitted with IncrementalPCA) over a vocabulary of column names, so that pages with
+    page-local columns (e.g. features sorted by name) can be projected onto the same basis.
+    Columns unknown to the basis are dropped when projecting.
+    """
+
+    def __init__(self, columns: List[str], n_components: int):
+        from sklearn.decomposition import IncrementalPCA
+
+        self.columns = columns
+        self.columns_idx: Dict[str, int] = {c: i for i, c in enumerate(columns)}
+        self.ipca = IncrementalPCA(n_components=n_components)
+        self.pages = 0
+
+        # ratio of the variance of the page the basis was fitted on kept by the basis (reference of drift)
+        self.explained_variance_ratio = 1.
+
+    def _align(self, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Indexes of page columns known to the basis, and their indexes in the basis."""
+        basis_idx = np.array([self.columns_idx.get(c, -1) for c in columns], dtype=np.int64)
+        page_idx = np.flatnonzero(basis_idx >= 0)
+        return page_idx, basis_idx[page_idx]
+
+    def fit_transform(self, x: csr_matrix) -> np.ndarray:
+        """
+        Fit the basis on all rows of x (with the columns of the basis) with sparse_pca, and return
+        the projection of x, the same as without the basis. The state of IncrementalPCA is set from the fit,
+        so that the basis can be updated with partial_fit.
+        """
+        n_samples, n_features = x.shape
+        projected_x, components, singular_values, mean = sparse_pca(
+            x, n_components=self.ipca.n_components, return_components=True)
+        var = np.asarray(x.multiply(x).mean(axis=0)).ravel() - np.square(mean)
+        explained_variance = np.square(singular_values) / (n_samples - 1)
+
+        self.ipca.n_components_ = components.shape[0]
+        self.ipca.n_features_in_ = n_features
+        self.ipca.n_samples_seen_ = n_samples
+        self.ipca.components_ = components
+        self.ipca.singular_values_ = singular_values
+        self.ipca.mean_ = mean
+        self.ipca.var_ = var
+        self.ipca.explained_variance_ = explained_variance
+        total_variance = var.sum() * n_samples / (n_samples - 1)
+        self.ipca.explained_variance_ratio_ = explained_variance / max(total_variance, 1e-12)
+        self.pages += 1
+
+        self.explained_variance_ratio = get_explained_variance_ratio(x, projected_x)
+        return projected_x
+
+    def partial_fit(self, x: csr_matrix, columns: List[str], size: int, random_state: int = 0):
+        """Update the basis with (a sample of at most `size`) rows of x."""
+        rng = np.random.RandomState(random_state)
+        rows = np.sort(rng.choice(x.shape[0], size=size, replace=False)) if x.shape[0] > size else slice(None)
+        sample = x[rows]
+        page_idx, basis_idx = self._align(columns)
+        batch = np.zeros((sample.shape[0], len(self.columns)))
+        batch[:, basis_idx] = sample[:, page_idx].toarray()
+        self.ipca.partial_fit(batch)
+        self.pages += 1
+
+    def transform(self, x: csr_matrix, columns: List[str]) -> np.ndarray:
+        """Projection of x, as a single sparse matrix product."""
+        page_idx, basis_idx = self._align(columns)
+        components = np.zeros((len(columns), self.ipca.n_components_))
+        components[page_idx] = self.ipca.components_[:, basis_idx].T
+        return x @ components - self.ipca.mean_ @ self.ipca.components_.T
+
+
+class ProjectionCache(object):
+    """
+    In-memory LRU of PCA bases keyed by site and template, so that pages of a site sharing a template,
+    and thus most of their features, are projected onto a known basis instead of fitting a PCA
+    (randomized SVD) for every page. A new basis is fitted on all rows of the page, with the same
+    projection as without the cache.
+
+    The cache is per process (each detection worker has its own), and disabled unless
+    WEBSPOT_PROJECTION_CACHE_SIZE is set, as the projection of a page (hence its clusters) then
+    depends on the pages seen before it.
+
+    A page is projected onto the basis of its key if the basis keeps about as much of the page's
+    variance as of the page it was fitted on (relative drop at most `max_drift`). If the drop is more
+    than `min_update_drift`, the basis is then updated with a small sample of the page rows, so that
+    pages already well represented do not cost any SVD. Otherwise (no basis, or drift, e.g. new
+    features), a new basis is fitted on the page.
+    """
+
+    def __init__(
+        self,
+        size: int = PROJECTION_CACHE_SIZE,
+        max_drift: float = PROJECTION_MAX_DRIFT,
+        min_update_drift: float = PROJECTION_MIN_UPDATE_DRIFT,
+        update_size: int = PROJECTION_UPDATE_SIZE,
+    ):
+        self.size = size
+        self.max_drift = max_drift
+        self.min_update_drift = min_update_drift
+        self.update_size = update_size
+        self._bases: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+        self.updates = 0
+        self.refits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def transform(
+        self,
+        key: Tuple[Optional[str], str],
+        x: csr_matrix,
+        columns: List[str],
+        n_components: int,
+    ) -> np.ndarray:
+        """
+        Projection of x (rows with named columns, at least `n_components` rows and columns) on
+        `n_components` components of the basis of the key, fitting or refitting the basis if needed.
+        """
+        cache_key: ProjectionKey = (key, n_components)
+        with self._lock:
+            basis: Optional[ProjectionBasis] = self._bases.get(cache_key)
+
+            # project onto the known basis, unless it has drifted
+            if basis is not None:
+                projected_x = basis.transform(x, columns)
+                explained_variance_ratio = get_explained_variance_ratio(x, projected_x)
+                drift = 1 - explained_variance_ratio / max(basis.explained_variance_ratio, 1e-12)
+                if drift <= self.max_drift:
+                    self.stats.hit()
+                    self._bases.move_to_end(cache_key)
+                    if drift > self.min_update_drift:
+                        basis.partial_fit(x, columns, size=max(self.update_size, n_components),
+                                          random_state=basis.pages)
+                        self.updates += 1
+                    return projected_x
+                logger.debug(f'projection basis of {key} drifted ({drift:.3f}), refitting')
+                self.refits += 1
+            self.stats.miss()
+
+            # fit a new basis on all rows of the page
+            basis = ProjectionBasis(columns, n_components)
+            projected_x = basis.fit_transform(x)
+            self._bases[cache_key] = basis
+            self._bases.move_to_end(cache_key)
+            while len(self._bases) > self.size:
+                self._bases.popitem(last=False)
+            return projected_x
+
+    def clear(self):
+        with self._lock:
+            self._bases.clear()
+
+    def __len__(self):
+        return len(self._bases)
+
+    def dict(self) -> dict:
+        return {
+            'size': len(self._bases),
+            'max_size': self.size,
+            'updates': self.updates,
+            'refits': self.refits,
+            **self.stats.dict(),
+        }
+
+
+# projection cache of detectors of the process
+projection_cache = ProjectionCache()
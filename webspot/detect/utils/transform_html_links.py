@@ -6,7 +6,11 @@ from bs4 import BeautifulSoup, Tag
 
 def transform_html_links(html: str, url: str) -> str:
     soup = BeautifulSoup(html, 'html.parser')
+    transform_soup_links(soup, url)
+    return str(soup)
+
 
+def transform_soup_links(soup: BeautifulSoup, url: str):
     for el in soup.select('a'):
         _transform_a(el, url)
 
@@ -22,8 +26,6 @@ def transform_html_links(html: str, url: str) -> str:
         else:
             el.decompose()
 
-    return str(soup)
-
 
 def _transform(el: Tag, key: str, root_url: str):
     if el.get(key) and _is_relative_url_path(el[key]):
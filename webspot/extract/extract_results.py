@@ -1,13 +1,45 @@
+import asyncio
 from datetime import datetime
-from typing import List
+from functools import partial
+from typing import List, Dict, Optional
 
 from webspot.constants.detector import DETECTOR_PAGINATION, DETECTOR_PLAIN_LIST
 from webspot.constants.html_request_method import HTML_REQUEST_METHOD_REQUEST
-from webspot.detect.detectors.pagination import PaginationDetector
-from webspot.detect.detectors.plain_list import PlainListDetector
+from webspot.detect.detectors.base import BaseDetector
+from webspot.detect.utils.transform_html_links import transform_soup_links
+from webspot.detect.utils.url import get_url_domain
+from webspot.extract.result_cache import ResultCache, result_cache as default_result_cache, get_result_cache_key
+from webspot.extract.rule_store import RuleStore, rule_store as default_rule_store
 from webspot.graph.graph_loader import GraphLoader
+from webspot.logging import get_logger
 from webspot.request.html_requester import HtmlRequester
 
+logger = get_logger('webspot.extract.extract_results')
+
+
+def _get_detector_cls(detector_name: str):
+    # detectors (and their dependencies) are imported on first use
+    if detector_name == DETECTOR_PLAIN_LIST:
+        from webspot.detect.detectors.plain_list import PlainListDetector
+        return PlainListDetector
+    elif detector_name == DETECTOR_PAGINATION:
+        from webspot.detect.detectors.pagination import PaginationDetector
+        return PaginationDetector
+    else:
+        raise Exception(f'Invalid detector: {detector_name}')
+
+
+def _get_html_requester(url: str = None, method: str = None, duration: int = None, html: str = None) -> HtmlRequester:
+    if method is None or method == '':
+        method = HTML_REQUEST_METHOD_REQUEST
+
+    return HtmlRequester(
+        url=url,
+        html=html,
+        request_method=method,
+        request_rod_duration=duration,
+    )
+
 
 def extract_rules(
     url: str = None,
@@ -15,64 +47,95 @@ def extract_rules(
     duration: int = None,
     html: str = None,
     detectors: List[str] = None,
+    detector_kwargs: Dict[str, dict] = None,
+    result_cache: Optional[ResultCache] = default_result_cache,
+    rule_store: Optional[RuleStore] = default_rule_store,
+    html_requester: HtmlRequester = None,
 ):
-    if method is None or method == '':
-        method = HTML_REQUEST_METHOD_REQUEST
-
     if detectors is None:
         detectors = [DETECTOR_PLAIN_LIST, DETECTOR_PAGINATION]
 
+    if detector_kwargs is None:
+        detector_kwargs = {}
+
     execution_time = {
         'html_requester': None,
         'graph_loader': None,
         'detectors': {},
     }
 
-    # html requester
+    # html requester (unless already run, e.g. by extract_rules_async)
     tic = datetime.now()
-    html_requester = HtmlRequester(
-        url=url,
-        html=html,
-        request_method=method,
-        request_rod_duration=duration,
-    )
-    html_requester.run()
+    if html_requester is None:
+        html_requester = _get_html_requester(url, method, duration, html)
+        html_requester.run(parse=False)
+    url = html_requester.url
     execution_time['html_requester'] = round((datetime.now() - tic).total_seconds() * 1000)
 
+    # cached results of the same html, detectors and parameters
+    cache_key = None
+    if result_cache is not None and result_cache.enabled:
+        cache_key = get_result_cache_key(html_requester.html_, url, detectors, detector_kwargs)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f'result cache hit: {cache_key}')
+            results = cached.get('results')
+            execution_time['result_cache'] = True
+            detectors_ = get_detectors_from_results(results, html_requester, detectors, detector_kwargs)
+            return results, execution_time, html_requester, None, detectors_
+
+    # parse html document
+    tic = datetime.now()
+    html_requester.load_document()
+    execution_time['html_requester'] += round((datetime.now() - tic).total_seconds() * 1000)
+
     # graph loader
     tic = datetime.now()
     graph_loader = GraphLoader(
         html=html_requester.html_,
-        json_data=html_requester.json_data,
+        document=html_requester.document,
     )
-    graph_loader.run()
+    graph_loader.load_structure()
     execution_time['graph_loader'] = round((datetime.now() - tic).total_seconds() * 1000)
 
+    # rules detected on previous pages of the same site and template (pages without url are not
+    # matched, as their site is unknown)
+    rule_key = None
+    rules = {}
+    if rule_store is not None and rule_store.enabled and url:
+        rule_key = (get_url_domain(url), graph_loader.template_fingerprint)
+        rules = rule_store.get(rule_key)
+
     # run detectors
-    html = html_requester.html
     results = {}
     detectors_ = []
+    execution_time['rule_store'] = []
     for detector_name in detectors:
         # start time
         tic = datetime.now()
 
         # detector class
-        if detector_name == DETECTOR_PLAIN_LIST:
-            detector_cls = PlainListDetector
-        elif detector_name == DETECTOR_PAGINATION:
-            detector_cls = PaginationDetector
-        else:
-            raise Exception(f'Invalid detector: {detector_name}')
+        detector_cls = _get_detector_cls(detector_name)
 
         # run detector
         detector = detector_cls(
             graph_loader=graph_loader,
             html_requester=html_requester,
+            **detector_kwargs.get(detector_name, {}),
         )
-        detector.run()
+        if rules.get(detector_name) and detector.revalidate(rules[detector_name]):
+            # reuse revalidated rules
+            execution_time['rule_store'].append(detector_name)
+        else:
+            # full detection (features are loaded once for all detectors)
+            graph_loader.load_features()
+            execution_time['graph_loader'] += round((datetime.now() - tic).total_seconds() * 1000)
+            tic = datetime.now()
+            detector.run()
 
-        # highlight html
-        html = detector.highlight_html(html)
+            # store rules for next pages of the same template
+            if rule_key is not None and len(detector.results) > 0:
+                rule_store.set(rule_key, detector_name, [r.dict() for r in detector.results])
 
         # add to results
         results[detector_name] = [r.dict() for r in detector.results]
@@ -83,4 +146,72 @@ def extract_rules(
         # execution time
         execution_time['detectors'][detector_name] = round((datetime.now() - tic).total_seconds() * 1000)
 
+    # cache results
+    if cache_key is not None:
+        result_cache.set(cache_key, {'results': results})
+
     return results, execution_time, html_requester, graph_loader, detectors_
+
+
+async def extract_rules_async(
+    url: str = None,
+    method: str = None,
+    duration: int = None,
+    html: str = None,
+    **kwargs,
+):
+    """
+    Same as extract_rules, requesting the html page with the shared async http client
+    and running detection in a worker thread, so that the event loop is not blocked.
+    """
+    # html requester
+    tic = datetime.now()
+    html_requester = _get_html_requester(url, method, duration, html)
+    await html_requester.run_async(parse=False)
+    request_time = round((datetime.now() - tic).total_seconds() * 1000)
+
+    # detection
+    loop = asyncio.get_running_loop()
+    results, execution_time, html_requester, graph_loader, detectors_ = await loop.run_in_executor(
+        None,
+        partial(extract_rules, html_requester=html_requester, **kwargs),
+    )
+    execution_time['html_requester'] += request_time
+
+    return results, execution_time, html_requester, graph_loader, detectors_
+
+
+def get_detectors_from_results(
+    results: Dict[str, List[dict]],
+    html_requester: HtmlRequester,
+    detectors: List[str] = None,
+    detector_kwargs: Dict[str, dict] = None,
+) -> List[BaseDetector]:
+    """Detectors with results of a previous run (e.g. cached or run in another process), for highlighting."""
+    if detectors is None:
+        detectors = list(results.keys())
+
+    if detector_kwargs is None:
+        detector_kwargs = {}
+
+    return [
+        _get_detector_cls(detector_name).from_results(
+            results=results.get(detector_name) or [],
+            html_requester=html_requester,
+            **detector_kwargs.get(detector_name, {}),
+        )
+        for detector_name in detectors
+    ]
+
+
+def highlight_results(html_requester: HtmlRequester, detectors: List[BaseDetector]) -> str:
+    # copy of the parsed document with links transformed
+    html_requester.load_document()
+    soup = html_requester.document.copy_soup()
+    transform_soup_links(soup, html_requester.url)
+
+    # highlight results of all detectors on the same soup
+    for detector in detectors:
+        detector.highlight_soup(soup)
+
+    return str(soup)
@@ -0,0 +1,170 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from webspot.constants.html_request_method import HTML_REQUEST_METHOD_REQUEST
+from webspot.extract.worker_pool import WorkerPool, run_extract_rules_job
+from webspot.request.html_requester import HtmlRequester
+
+JOB_MAX_WORKERS = int(os.environ.get('WEBSPOT_JOB_MAX_WORKERS', os.cpu_count() or 1))
+JOB_MAX_FETCHES = int(os.environ.get('WEBSPOT_JOB_MAX_FETCHES', 32))
+JOB_MAX_QUEUE_SIZE = int(os.environ.get('WEBSPOT_JOB_MAX_QUEUE_SIZE', 256))
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobScheduler(object):
+    """
+    Scheduler of detection jobs: pages are fetched concurrently (up to `max_fetches`) with the
+    async html requester, and detection (CPU-bound) runs in a pool of `max_workers` worker processes.
+
+    At most `max_queue_size` jobs are admitted at a time (queued or running); beyond that,
+    `submit` raises JobQueueFullError, so that callers can push back (e.g. 429) instead of
+    piling up work. Caches (results, rules) are per worker process.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        max_fetches: int = JOB_MAX_FETCHES,
+        max_queue_size: int = JOB_MAX_QUEUE_SIZE,
+        job_fn: Callable = run_extract_rules_job,
+    ):
+        # settings
+        self.max_workers = max_workers
+        self.max_fetches = max_fetches
+        self.max_queue_size = max_queue_size
+
+        # stats
+        self.queued = 0
+        self.running = 0
+        self.done = 0
+        self.failed = 0
+        self.rejected = 0
+
+        # detection workers
+        self.worker_pool = WorkerPool(max_workers=max_workers, job_fn=job_fn)
+
+        # internals
+        self._fetch_semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def full(self) -> bool:
+        return len(self._tasks) >= self.max_queue_size
+
+    def submit(
+        self,
+        url: str = None,
+        method: str = None,
+        duration: int = None,
+        html: str = None,
+        detectors: List[str] = None,
+        detector_kwargs: Dict[str, dict] = None,
+        on_running: Callable[[], Awaitable[None]] = None,
+    ) -> asyncio.Task:
+        """
+        Admit a job, or raise JobQueueFullError if the queue is full. The returned task resolves
+        to (results, execution time, html requester); `on_running` (async, so that it does not
+        block the event loop) is awaited when detection starts, once the page is fetched.
+        """
+        if self.full:
+            self.rejected += 1
+            raise JobQueueFullError(f'job queue is full ({self.max_queue_size} jobs)')
+
+        # semaphore is bound to the running event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._fetch_semaphore = asyncio.Semaphore(self.max_fetches)
+            self._loop = loop
+
+        self.queued += 1
+        task = asyncio.create_task(self._run(
+            url=url,
+            method=method,
+            duration=duration,
+            html=html,
+            detectors=detectors,
+            detector_kwargs=detector_kwargs,
+            on_running=on_running,
+        ))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(
+        self,
+        url: Optional[str],
+        method: Optional[str],
+        duration: Optional[int],
+        html: Optional[str],
+        detectors: Optional[List[str]],
+        detector_kwargs: Optional[Dict[str, dict]],
+        on_running: Optional[Callable[[], Awaitable[None]]],
+    ) -> Tuple[Dict[str, List[dict]], dict, HtmlRequester]:
+        tic = datetime.now()
+        queued = True
+        try:
+            async with self._fetch_semaphore:
+                # leave queue
+                self.queued -= 1
+                self.running += 1
+                queued = False
+                queue_time = round((datetime.now() - tic).total_seconds() * 1000)
+
+                # fetch (I/O-bound)
+                tic = datetime.now()
+                html_requester = HtmlRequester(
+                    url=url,
+                    html=html,
+                    request_method=method or HTML_REQUEST_METHOD_REQUEST,
+                    request_rod_duration=duration,
+                )
+                await html_requester.run_async(parse=False)
+                request_time = round((datetime.now() - tic).total_seconds() * 1000)
+
+            # detection (CPU-bound)
+            if on_running is not None:
+                await on_running()
+            results, execution_time = await self.worker_pool.run(
+                url=html_requester.url,
+                html=html_requester.html_,
+                detectors=detectors,
+                detector_kwargs=detector_kwargs,
+            )
+            execution_time['queue'] = queue_time
+            execution_time['html_requester'] = (execution_time.get('html_requester') or 0) + request_time
+
+            self.done += 1
+            return results, execution_time, html_requester
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if queued:
+                self.queued -= 1
+            else:
+                self.running -= 1
+
+    def shutdown(self):
+        self.worker_pool.shutdown(wait=False)
+
+    def dict(self) -> dict:
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'done': self.done,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'max_workers': self.max_workers,
+            'max_fetches': self.max_fetches,
+            'max_queue_size': self.max_queue_size,
+        }
+
+
+# job scheduler of the web app
+job_scheduler = JobScheduler()
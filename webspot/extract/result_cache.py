@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict
+
+from webspot.logging import get_logger
+from webspot.utils.cache import CacheStats
+
+logger = get_logger('webspot.extract.result_cache')
+
+RESULT_CACHE_SIZE = int(os.environ.get('WEBSPOT_RESULT_CACHE_SIZE', 128))
+RESULT_CACHE_DIR = os.environ.get('WEBSPOT_RESULT_CACHE_DIR')
+RESULT_CACHE_DIR_MAX_SIZE = int(os.environ.get('WEBSPOT_RESULT_CACHE_DIR_MAX_SIZE', 1024 * 1024 * 1024))
+
+
+def normalize_html(html: str) -> str:
+    """
+    Normalized html for cache keys: line endings, trailing whitespaces and node ids
+    (e.g. html previously processed and stored with node ids) are ignored.
+    """
+    html = re.sub(r' node-id="\d+"', '', html)
+    lines = html.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+def get_result_cache_key(html: str, url: Optional[str], detectors: List[str],
+                         detector_kwargs: Optional[Dict[str, dict]] = None) -> str:
+    """
+    Content-addressed key of the results of extract_rules. The url is part of the key,
+    as links in the results are resolved against it.
+    """
+    params = json.dumps({
+        'url': url,
+        'detectors': detectors,
+        'detector_kwargs': detector_kwargs or {},
+    }, sort_keys=True, default=str)
+    h = hashlib.sha256()
+    h.update(normalize_html(html).encode('utf-8', errors='replace'))
+    h.update(b'\0')
+    h.update(params.encode('utf-8'))
+    return h.hexdigest()
+
+
+class ResultCache(object):
+    """
+    Two-tier cache of json-serializable values: an in-memory LRU of `size` entries, and an
+    optional on-disk tier in `cache_dir` (one json file per key), whose least recently used
+    files are removed once the total size exceeds `cache_dir_max_size` bytes.
+
+    Values are kept serialized, so that callers get their own copy on every hit.
+    """
+
+    def __init__(
+        self,
+        size: int = RESULT_CACHE_SIZE,
+        cache_dir: Optional[str] = RESULT_CACHE_DIR,
+        cache_dir_max_size: int = RESULT_CACHE_DIR_MAX_SIZE,
+    ):
+        # settings
+        self.size = size
+        self.cache_dir = cache_dir
+        self.cache_dir_max_size = cache_dir_max_size
+
+        # memory tier
+        self._memory: OrderedDict = OrderedDict()
+
+        # disk tier
+        self._disk_size: Optional[int] = None
+
+        # internals
+        self._lock = threading.Lock()
+
+        # stats
+        self.memory_stats = CacheStats()
+        self.disk_stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 or self.cache_dir is not None
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            # memory tier
+            if key in self._memory:
+                self.memory_stats.hit()
+                self._memory.move_to_end(key)
+                return json.loads(self._memory[key])
+            if self.size > 0:
+                self.memory_stats.miss()
+
+            # disk tier
+            if self.cache_dir is None:
+                return None
+            path = self._get_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                value = json.loads(content)
+                os.utime(path)
+            except (OSError, ValueError):
+                self.disk_stats.miss()
+                return None
+            self.disk_stats.hit()
+
+            # promote to memory tier
+            self._set_memory(key, content)
+            return value
+
+    def set(self, key: str, value: dict):
+        content = json.dumps(value, default=str).encode('utf-8')
+        with self._lock:
+            self._set_memory(key, content)
+            if self.cache_dir is not None:
+                try:
+                    self._set_disk(key, content)
+                except OSError as e:
+                    logger.warning(f'failed to write result cache: {e}')
+
+    def _set_memory(self, key: str, content: bytes):
+        if self.size <= 0:
+            return
+        self._memory[key] = content
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    def _set_disk(self, key: str, content: bytes):
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        disk_size = self._get_disk_size()
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        # write atomically
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        # evict least recently used files if exceeding max size
+        self._disk_size = disk_size + len(content) - previous_size
+        if self._disk_size > self.cache_dir_max_size:
+            self._evict_disk()
+
+    def _list_disk(self) -> List[os.DirEntry]:
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for sub_entry in os.scandir(self.cache_dir):
+            if not sub_entry.is_dir():
+                continue
+            entries.extend(e for e in os.scandir(sub_entry.path) if e.name.endswith('.json'))
+        return entries
+
+    def _get_disk_size(self) -> int:
+        if self._disk_size is None:
+            self._disk_size = sum(e.stat().st_size for e in self._list_disk())
+        return self._disk_size
+
+    def _evict_disk(self):
+        entries = sorted(self._list_disk(), key=lambda e: e.stat().st_mtime)
+        size = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if size <= self.cache_dir_max_size:
+                break
+            try:
+                entry_size = entry.stat().st_size
+                os.remove(entry.path)
+                size -= entry_size
+            except OSError:
+                continue
+        self._disk_size = size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir is not None:
+                for entry in self._list_disk():
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        continue
+                self._disk_size = 0
+
+    def dict(self) -> dict:
+        return {
+            'memory': {
+                'size': len(self._memory),
+                'max_size': self.size,
+                **self.memory_stats.dict(),
+            },
+            'disk': {
+                'enabled': self.cache_dir is not None,
+                'size': self._disk_size,
+                'max_size': self.cache_dir_max_size,
+                **self.disk_stats.dict(),
+            },
+        }
+
+
+# result cache of extract_rules
+result_cache = ResultCache()
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from webspot.utils.cache import CacheStats
+
+# disabled by default: results of a page then depend on pages of the same template seen before
+RULE_STORE_SIZE = int(os.environ.get('WEBSPOT_RULE_STORE_SIZE', 0))
+
+# (domain, template fingerprint)
+RuleKey = Tuple[str, str]
+
+
+class RuleStore(object):
+    """
+    In-memory LRU of detector results keyed by (domain, template fingerprint), so that pages
+    sharing a known DOM skeleton can reuse the selectors detected on a previous page after
+    a cheap revalidation, instead of running full detection.
+
+    Only the stored results are revalidated, so lists that first appear on a later page of the
+    template are not detected. The store is therefore disabled unless WEBSPOT_RULE_STORE_SIZE is set.
+    """
+
+    def __init__(self, size: int = RULE_STORE_SIZE):
+        self.size = size
+        self._rules: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def get(self, key: RuleKey) -> Dict[str, List[dict]]:
+        """Results of each detector stored for the key (empty if none)."""
+        with self._lock:
+            content = self._rules.get(key)
+            if content is None:
+                self.stats.miss()
+                return {}
+            self.stats.hit()
+            self._rules.move_to_end(key)
+            return json.loads(content)
+
+    def set(self, key: RuleKey, detector_name: str, results: List[dict]):
+        """Store results of a detector for the key, keeping results of other detectors."""
+        if self.size <= 0:
+            return
+        with self._lock:
+            content = self._rules.get(key)
+            rules = json.loads(content) if content is not None else {}
+            rules[detector_name] = results
+            self._rules[key] = json.dumps(rules, default=str)
+            self._rules.move_to_end(key)
+            while len(self._rules) > self.size:
+                self._rules.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._rules.clear()
+
+    def __len__(self):
+        return len(self._rules)
+
+    def dict(self) -> dict:
+        return {
+            'size': len(self._rules),
+            'max_size': self.size,
+            **self.stats.dict(),
+        }
+
+
+# rule store of extract_rules
+rule_store = RuleStore()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from webspot.logging import get_logger
+
+logger = get_logger('webspot.extract.worker_pool')
+
+# start method of worker processes ("forkserver" if available, i.e. on posix)
+WORKER_START_METHOD = os.environ.get(
+    'WEBSPOT_WORKER_START_METHOD',
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn',
+)
+
+# modules imported once by the fork server, so that workers forked from it start warm
+# (detectors import their dependencies on first use, so these are listed as well)
+DEFAULT_WORKER_PRELOAD_MODULES = [
+    'webspot.extract.extract_results',
+    'webspot.detect.detectors.plain_list',
+    'webspot.detect.detectors.pagination',
+    'sklearn.cluster',
+    'sklearn.preprocessing',
+    'sklearn.decomposition',
+    'autopager',
+]
+WORKER_PRELOAD_MODULES = [
+    m.strip()
+    for m in os.environ.get('WEBSPOT_WORKER_PRELOAD_MODULES', ','.join(DEFAULT_WORKER_PRELOAD_MODULES)).split(',')
+    if m.strip()
+]
+
+# compression level of payloads (html compresses well, speed matters more than ratio)
+PAYLOAD_COMPRESSION_LEVEL = 1
+
+
+def encode_payload(data) -> bytes:
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), PAYLOAD_COMPRESSION_LEVEL)
+
+
+def decode_payload(payload: bytes):
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def run_extract_rules_job(
+    url: Optional[str],
+    html: str,
+    detectors: Optional[List[str]] = None,
+    detector_kwargs: Optional[Dict[str, dict]] = None,
+) -> Tuple[Dict[str, List[dict]], dict]:
+    """Detection of a fetched page in a worker process, returning only serializable results and timing."""
+    from webspot.extract.extract_results import extract_rules
+
+    results, execution_time, _, _, _ = extract_rules(
+        url=url,
+        html=html,
+        detectors=detectors,
+        detector_kwargs=detector_kwargs,
+    )
+    return results, execution_time
+
+
+def get_cache_stats() -> dict:
+    """Stats of the caches of the current process (each worker process has its own caches)."""
+    from webspot.detect.utils.projection_cache import projection_cache
+    from webspot.extract.result_cache import result_cache
+    from webspot.extract.rule_store import rule_store
+    from webspot.graph.vocabulary import feature_vocabulary
+
+    return {
+        'result_cache': result_cache.dict(),
+        'rule_store': rule_store.dict(),
+        'feature_vocabulary': feature_vocabulary.dict(),
+        'projection_cache': projection_cache.dict(),
+    }
+
+
+def _run_payload(job_fn: Callable, payload: bytes) -> bytes:
+    result = job_fn(**decode_payload(payload))
+    return encode_payload({'result': result, 'pid': os.getpid(), 'cache_stats': get_cache_stats()})
+
+
+class WorkerPool(object):
+    """
+    Pool of detection worker processes.
+
+    With the "forkserver" start method, workers are forked from a server process that has already
+    imported the heavy modules (`preload_modules`), instead of importing them in each new worker.
+    Jobs and results are passed as compressed json payloads rather than pickled objects.
+
+    The fork server is shared by the whole process (multiprocessing has a single one), so the preload
+    list set by the first pool to start workers applies to all forkserver processes started later,
+    including by other pools or libraries.
+
+    Caches are singletons of each worker process: every job returns the cache stats of its worker,
+    and the latest ones of each worker are kept in `workers_cache_stats` (by pid).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        start_method: Optional[str] = WORKER_START_METHOD,
+        preload_modules: List[str] = None,
+        job_fn: Callable = run_extract_rules_job,
+    ):
+        # settings
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.start_method = start_method
+        self.preload_modules = preload_modules if preload_modules is not None else WORKER_PRELOAD_MODULES
+        self.job_fn = job_fn
+
+        # stats
+        self.workers_cache_stats: Dict[int, dict] = {}
+
+        # internals
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            mp_context = multiprocessing.get_context(self.start_method)
+            if self.start_method == 'forkserver':
+                # process-wide, effective only if the fork server is not running yet
+                mp_context.set_forkserver_preload(self.preload_modules)
+            logger.debug(f'starting {self.max_workers} workers ({self.start_method})')
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context)
+        return self._executor
+
+    def start(self):
+        """Start the workers (and fork server) ahead of the first job, without waiting for them."""
+        for _ in range(self.max_workers):
+            self.executor.submit(os.getpid)
+
+    def submit(self, **job) -> Future:
+        """Submit a job (keyword arguments of job_fn). The future resolves to the (decoded) result of job_fn."""
+        future = Future()
+        payload_future = self.executor.submit(_run_payload, self.job_fn, encode_payload(job))
+
+        def _done(f: Future):
+            try:
+                res = decode_payload(f.result())
+                self.workers_cache_stats[res['pid']] = res['cache_stats']
+                future.set_result(tuple(res['result']))
+            except BaseException as e:
+                future.set_exception(e)
+
+        payload_future.add_done_callback(_done)
+        return future
+
+    async def run(self, **job):
+        return await asyncio.wrap_future(self.submit(**job))
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        self._executor = None
+        self.workers_cache_stats = {}
@@ -0,0 +1,29 @@
+import hashlib
+import json
+
+import numpy as np
+
+from webspot.graph.models.node_table import NodeTable
+
+
+def get_template_fingerprint(node_table: NodeTable, max_depth: int) -> str:
+    """
+    Structural fingerprint of a page: hash of the unique (depth, tag, classes) of its nodes down
+    to `max_depth`, regardless of their order and count, so that pages of the same template
+    (e.g. page 2..N of a category, with different items) share the same fingerprint.
+    """
+    depth = np.asarray(node_table.depth, dtype=np.int64)
+    mask = depth <= max_depth
+    keys = np.stack([
+        depth[mask],
+        np.asarray(node_table.tag_codes, dtype=np.int64)[mask],
+        np.asarray(node_table.classes_codes, dtype=np.int64)[mask],
+    ], axis=1)
+    keys = np.unique(keys, axis=0) if len(keys) > 0 else keys
+
+    # codes are local to the node table, so the skeleton is compared by names
+    skeleton = sorted(
+        (int(d), node_table.tags[t] if t >= 0 else '', ' '.join(node_table.classes[c]))
+        for d, t, c in keys.tolist()
+    )
+    return hashlib.sha1(json.dumps(skeleton).encode('utf-8')).hexdigest()
@@ -1,21 +1,22 @@
 import json
 from typing import List, Tuple, Dict, Optional
 
-import dgl
-import html_to_json_enhanced
-import networkx as nx
 import numpy as np
-import torch
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from html_to_json_enhanced import iterate
-from networkx import DiGraph, dfs_successors
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.preprocessing import LabelEncoder
-from dgl import DGLGraph
+from scipy.sparse import csr_matrix
 
+from webspot.constants.embed_backend import EMBED_BACKEND_NUMPY, EMBED_BACKEND_DGL, ALL_EMBED_BACKENDS
+from webspot.graph.fingerprint import get_template_fingerprint
 from webspot.graph.models.node import Node
+from webspot.graph.models.node_table import NodeTable
+from webspot.graph.node_builder import get_root_tag, assign_node_ids, get_node_features, iterate_node_records
+from webspot.graph.vocabulary import FeatureVocabulary, feature_vocabulary
 from webspot.logging import get_logger
+from webspot.request.html_document import HtmlDocument
+from webspot.utils.cache import CacheStats
 from webspot.utils.selector import is_valid_css_selector
+from webspot.graph.walks import random_walk
 
 logger = get_logger('webspot.graph.graph_loader')
 
@@ -34,14 +35,24 @@ class GraphLoader(object):
     def __init__(
         self,
         html: str,
-        json_data: dict,
+        json_data: dict = None,
+        document: HtmlDocument = None,
         body_only: bool = True,
         embed_walk_length: int = 8,
+        embed_backend: str = EMBED_BACKEND_NUMPY,
         dfs_depth: int = 8,
+        fingerprint_depth: int = 5,
+        random_seed: Optional[int] = None,
+        vocabulary: FeatureVocabulary = None,
     ):
+        if embed_backend not in ALL_EMBED_BACKENDS:
+            raise Exception(f'Invalid embed backend: {embed_backend}')
+
         # settings
         self.body_only = body_only
         self.embed_walk_length = embed_walk_length
+        self.embed_backend = embed_backend
+        self.random_seed = random_seed
         self.available_feature_keys = [
             'tag',
             'id',
@@ -49,43 +60,70 @@ class GraphLoader(object):
             'style',
         ]
         self.dfs_depth = dfs_depth
+        self.fingerprint_depth = fingerprint_depth
 
         # data
         self.html = html
         self.json_data = json_data
+        self.document = document
         self.root_node_json: dict = {}
+        self.node_table = NodeTable()
         self.nodes_: List[Node] = []
-        self.nodes_ids: List[int] = []
-        self.nodes_features: List[Dict[str, int]] = []
+        self.nodes_features_names: List[str] = []
         self.edge_nodes: List[Node] = []
 
         # internals
         self._nodes_dict = None
-        self._css_selector_repr_cache = {}
+        self._css_selector_repr_cache: Dict[Tuple[int, bool, bool], str] = {}
+        self._css_selector_path_cache: Dict[Tuple[int, Optional[int], bool, bool], Optional[str]] = {}
         self._unique_node_feature_id_dict: Optional[dict] = None
         self._nodes_texts: Optional[List[str]] = None
-        self._nodes_ids_idx_dict = None
         self._soup: Optional[BeautifulSoup] = None
-        self._g_nx: Optional[DiGraph] = None
+        self._nodes_features_tensor = None
+        self._nodes_features_count_vec: Optional[np.ndarray] = None
+        self._pruned_features_idx: Optional[np.ndarray] = None
+        self._pruned_nodes_features: Optional[csr_matrix] = None
+        self._nodes_walks_incidence_mat: Optional[csr_matrix] = None
+        self._template_fingerprint: Optional[str] = None
+        self._features_loaded = False
+
+        # features vocabulary (shared by the graph loaders of the process by default)
+        self.vocabulary = vocabulary if vocabulary is not None else feature_vocabulary
 
-        # encoders
-        self.nodes_features_enc = DictVectorizer()
-        self.node_ids_enc = LabelEncoder()
+        # random generator (walks and sampling)
+        self.rng = np.random.default_rng(random_seed)
 
-        # tensors
-        self.nodes_ids_tensor = torch.LongTensor()
-        self.nodes_features_tensor = torch.LongTensor()
-        self.edges_source_tensor = torch.LongTensor()
-        self.edges_target_tensor = torch.LongTensor()
-        self.nodes_embedded_tensor = torch.LongTensor()
-        self.nodes_text_length_tensor = torch.LongTensor()
+        # matrices
+        self.nodes_features_mat: Optional[csr_matrix] = None
 
         # vectors
+        self.nodes_encoded_ids_vec: Optional[np.ndarray] = None
+        self.edges_source_vec: Optional[np.ndarray] = None
+        self.edges_target_vec: Optional[np.ndarray] = None
+        self.nodes_walks_vec: Optional[np.ndarray] = None
         self.nodes_text_length_vec: Optional[np.ndarray] = None
         self.nodes_full_text_length_vec: Optional[np.ndarray] = None
 
-        # graph
-        self.g_dgl: Optional[DGLGraph] = None
+        # index vectors
+        self.nodes_ids_vec: Optional[np.ndarray] = None
+        self.nodes_id_to_idx_vec: Optional[np.ndarray] = None
+        self.nodes_parent_ids_vec: Optional[np.ndarray] = None
+        self.nodes_tags_vec: Optional[np.ndarray] = None
+        self.children_offsets_vec: Optional[np.ndarray] = None
+        self.children_idx_vec: Optional[np.ndarray] = None
+        self.nodes_sibling_pos_vec: Optional[np.ndarray] = None
+        self.nodes_sibling_of_type_vec: Optional[np.ndarray] = None
+        self.nodes_parent_idx_vec: Optional[np.ndarray] = None
+        self.nodes_depth_vec: Optional[np.ndarray] = None
+        self.nodes_root_idx_vec: Optional[np.ndarray] = None
+        self.nodes_subtree_end_vec: Optional[np.ndarray] = None
+
+        # graph (dgl embed backend only)
+        self.g_dgl = None
+
+        # cache stats
+        self.css_selector_repr_cache_stats = CacheStats()
+        self.css_selector_path_cache_stats = CacheStats()
 
     @property
     def nodes_dict(self):
@@ -94,20 +132,6 @@ class GraphLoader(object):
         self._nodes_dict = {n.id: n for n in self.nodes_}
         return self._nodes_dict
 
-    @property
-    def nodes_ids_idx_dict(self):
-        if self._nodes_ids_idx_dict:
-            return self._nodes_ids_idx_dict
-        self._nodes_ids_idx_dict = {n.id: i for i, n in enumerate(self.nodes_)}
-        return self._nodes_ids_idx_dict
-
-    @property
-    def g_nx(self) -> nx.DiGraph:
-        if self._g_nx:
-            return self._g_nx
-        self._g_nx = DiGraph(self.g_dgl.to_networkx())
-        return self._g_nx
-
     @property
     def soup(self):
         return self._soup
@@ -131,54 +155,50 @@ class GraphLoader(object):
 
         return list(iterate(root)), root
 
+    def get_nodes_root_tag(self, root: Tag) -> Tag:
+        # if body only
+        if self.body_only:
+            for el in root.children:
+                if isinstance(el, Tag) and el.name == 'body':
+                    return el
+            raise Exception('No body tag found')
+
+        return root
+
     def _load_graph_data(self, nodes_json_data: List[dict]):
         for i, node_json_data in enumerate(nodes_json_data):
-            # node
-            node = self._get_node(node_json_data)
-
             # skip escaped tags
-            if node.tag in ESCAPED_TAG_NAMES:
+            if node_json_data.get('_tag') in ESCAPED_TAG_NAMES:
                 continue
 
-            # add to all nodes
-            self.nodes_.append(node)
-
-            # add to all node features
-            # self.nodes_features.append(node.features_dict)
-            self.nodes_features.append({k: v for k, v in node.features_dict.items()
-                                        if k.split('=')[0] in self.available_feature_keys
-                                        })
-
-    def _get_node(self, node_json_data: dict) -> Node:
-        node_id = node_json_data.get('_id')
-        parent_id = node_json_data.get('_parent')
-
-        # node
-        node = Node({
-            'id': node_id,
-            'parent_id': parent_id,
-            'features': self._get_node_features(node_json_data),
-            'text': self._get_node_text(node_json_data),
-        })
-
-        return node
+            # add to node table
+            self._add_node(node_json_data)
+
+        # all nodes
+        self.node_table.build()
+        self.nodes_ = self.node_table.nodes
+
+    def _load_graph_data_from_soup(self, root: Tag):
+        # node records built from the parsed document (escaped tags skipped, their subtrees still walked)
+        records = iterate_node_records(self.get_nodes_root_tag(root), ESCAPED_TAG_NAMES)
+        for node_id, parent_id, features, text in records:
+            self.node_table.append(id=node_id, parent_id=parent_id, features=features, text=text)
+
+        # all nodes
+        self.node_table.build()
+        self.nodes_ = self.node_table.nodes
+
+    def _add_node(self, node_json_data: dict) -> Node:
+        return self.node_table.append(
+            id=node_json_data.get('_id'),
+            parent_id=node_json_data.get('_parent'),
+            features=self._get_node_features(node_json_data),
+            text=self._get_node_text(node_json_data),
+        )
 
     @staticmethod
     def _get_node_features(node_json_data: dict) -> List[Tuple[str, str]]:
-        # tags
-        features = [('tag', node_json_data.get('_tag'))]
-
-        # attributes
-        attributes = node_json_data.get('_attributes')
-        if attributes is not None:
-            for key, value in attributes.items():
-                if isinstance(value, list):
-                    for v in value:
-                        features.append((key, v))
-                else:
-                    features.append((key, value))
-
-        return features
+        return get_node_features(node_json_data.get('_tag'), node_json_data.get('_attributes'))
 
     @staticmethod
     def _get_node_text(node_json_data: dict) -> Optional[str]:
@@ -192,64 +212,221 @@ class GraphLoader(object):
             return
 
     def load_graph_data(self):
-        # get list data and root node
-        self.json_data = html_to_json_enhanced.convert_html.convert(self.html, with_id=True)
-        list_data, self.root_node_json = self.get_nodes_json_data(self.json_data)
+        # json data if given without a parsed document
+        if self.document is None and self.json_data is not None:
+            # get list data and root node
+            list_data, self.root_node_json = self.get_nodes_json_data(self.json_data)
 
-        # load graph data
-        self._load_graph_data(list_data)
+            # load graph data
+            self._load_graph_data(list_data)
+            return
 
-        # encode node ids
-        self.nodes_ids = self.node_ids_enc.fit_transform(
-            np.array([node.id for node in self.nodes_]).reshape(-1, 1)
-        )
+        # parsed document (reuse the shared document if available)
+        if self.document is not None:
+            root = self.document.root
+        else:
+            self._soup = BeautifulSoup(self.html, 'html.parser')
+            root = get_root_tag(self._soup)
+            assign_node_ids(root)
+
+        # load graph data
+        self._load_graph_data_from_soup(root)
 
     def load_tensors(self):
-        # nodes tensor
-        encoded_nodes = self.node_ids_enc.transform([n.id for n in self.nodes_])
-        self.nodes_ids_tensor = torch.LongTensor(encoded_nodes)
+        # encoded nodes (node indexes)
+        self.nodes_encoded_ids_vec = np.arange(len(self.nodes_))
+
+        # nodes features matrix (sparse, nodes x features)
+        self.nodes_features_mat = self._get_nodes_features_mat()
+        self._nodes_features_tensor = None
+        self._nodes_features_count_vec = None
+        self._pruned_features_idx = None
+        self._pruned_nodes_features = None
 
-        # nodes features tensor
-        features = self.nodes_features_enc.fit_transform(self.nodes_features).todense()
-        self.nodes_features_tensor = torch.tensor(data=features, dtype=torch.float32, requires_grad=True)
+        # edges (parent -> child) between nodes
+        self.edges_target_vec = np.flatnonzero(self.nodes_parent_idx_vec >= 0)
+        self.edges_source_vec = self.nodes_parent_idx_vec[self.edges_target_vec]
 
         # edge nodes
-        self.edge_nodes = [n for n in self.nodes_ if self.nodes_dict.get(n.parent_id) is not None]
+        self.edge_nodes = [self.nodes_[i] for i in self.edges_target_vec]
 
-        # edges tensors
-        encoded_source = self.node_ids_enc.transform([n.parent_id for n in self.edge_nodes])
-        encoded_target = self.node_ids_enc.transform([n.id for n in self.edge_nodes])
-        self.edges_source_tensor = torch.LongTensor(encoded_source)
-        self.edges_target_tensor = torch.LongTensor(encoded_target)
+    def _get_nodes_features_mat(self) -> csr_matrix:
+        # columns of each interned features list of the node table
+        columns_list, self.nodes_features_names = self.vocabulary.encode(
+            self.node_table.features,
+            keys=set(self.available_feature_keys),
+        )
+
+        # columns of each node, gathered from the features list it refers to
+        lengths = np.array([len(c) for c in columns_list], dtype=np.int64)
+        offsets = np.cumsum(lengths) - lengths
+        nodes_lengths = lengths[self.node_table.features_codes]
+        indptr = np.concatenate([[0], np.cumsum(nodes_lengths)]).astype(np.int64)
+        columns = np.concatenate(columns_list) if len(columns_list) > 0 else np.array([], dtype=np.int64)
+        indices = columns[np.arange(indptr[-1]) +
+                          np.repeat(offsets[self.node_table.features_codes] - indptr[:-1], nodes_lengths)]
+
+        return csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(self.nodes_), len(self.nodes_features_names)),
+        )
 
     def load_dgl_graph(self):
-        self.g_dgl = dgl.graph((self.edges_source_tensor, self.edges_target_tensor))
+        import dgl
+        import torch
+        self.g_dgl = dgl.graph((torch.LongTensor(self.edges_source_vec), torch.LongTensor(self.edges_target_vec)),
+                               num_nodes=len(self.nodes_))
 
     def load_embeddings(self):
-        # embedded nodes tensor
-        self.nodes_embedded_tensor = dgl.sampling.node2vec_random_walk(
+        # random walks from every node (padded with -1 when reaching a leaf)
+        if self.embed_backend == EMBED_BACKEND_DGL:
+            self.nodes_walks_vec = self._get_nodes_walks_dgl()
+        else:
+            self.nodes_walks_vec = self._get_nodes_walks_numpy()
+        self._nodes_walks_incidence_mat = None
+
+    def _get_nodes_walks_numpy(self) -> np.ndarray:
+        # out-edges of each node index, taken from the children index (keyed by node id)
+        offsets_start = self.children_offsets_vec[self.nodes_ids_vec]
+        offsets_end = self.children_offsets_vec[self.nodes_ids_vec + 1]
+        return random_walk(
+            offsets_start=offsets_start,
+            offsets_end=offsets_end,
+            indices=self.children_idx_vec,
+            nodes=self.nodes_encoded_ids_vec,
+            walk_length=self.embed_walk_length,
+            rng=self.rng,
+        )
+
+    def _get_nodes_walks_dgl(self) -> np.ndarray:
+        import dgl
+        import torch
+        if self.g_dgl is None:
+            self.load_dgl_graph()
+        if self.random_seed is not None:
+            dgl.seed(self.random_seed)
+        walks = dgl.sampling.node2vec_random_walk(
             g=self.g_dgl,
-            nodes=self.nodes_ids_tensor,
+            nodes=torch.LongTensor(self.nodes_encoded_ids_vec),
             p=1,
             q=1,
             walk_length=self.embed_walk_length,
         )
+        return walks.detach().numpy()
 
     def load_soup(self):
-        self._soup = BeautifulSoup(self.html, 'html.parser')
+        if self.document is not None:
+            self._soup = self.document.soup
+        elif self._soup is None:
+            self._soup = BeautifulSoup(self.html, 'html.parser')
+
+    def load_index(self):
+        """
+        Parent -> children index (CSR-style) and per-node sibling ordinals.
+
+        `nodes_ids_vec` maps node indexes to node ids, and `nodes_id_to_idx_vec` maps node ids
+        to node indexes (-1 for ids that are not nodes, e.g. escaped).
+
+        Children of the node with id `i` are the node indexes
+        `children_idx_vec[children_offsets_vec[i]:children_offsets_vec[i + 1]]`, in document order.
+        Offsets are keyed by node id (not index), so that nodes whose parent was escaped
+        are still grouped with their siblings.
+
+        Since nodes are in preorder, the descendants of the node at index `i` are among the indexes
+        `i + 1` to `nodes_subtree_end_vec[i]`, of which those with the same root (nodes whose
+        parent was escaped start a new tree) and a depth within the limit are returned by
+        `get_node_children_idx_recursive_by_idx`.
+        """
+        n = len(self.nodes_)
+
+        # node ids, parent ids (-1 if none), tag codes, parent index (-1 if the parent is not a node,
+        # e.g. escaped), depth and root, from the node table
+        self.nodes_ids_vec = self.node_table.ids
+        self.nodes_parent_ids_vec = self.node_table.parent_ids
+        self.nodes_tags_vec = self.node_table.tag_codes
+        self.nodes_parent_idx_vec = self.node_table.parent_idx
+        self.nodes_depth_vec = self.node_table.depth
+        self.nodes_root_idx_vec = self.node_table.root_idx
+
+        # node id -> node index
+        max_id = max(self.nodes_ids_vec.max(initial=-1), self.nodes_parent_ids_vec.max(initial=-1))
+        self.nodes_id_to_idx_vec = np.full(max_id + 1, -1, dtype=np.int64)
+        self.nodes_id_to_idx_vec[self.nodes_ids_vec] = np.arange(n)
+
+        # children sorted by parent id (stable, so document order is kept within each parent)
+        child_nodes_idx = np.flatnonzero(self.nodes_parent_ids_vec >= 0)
+        child_parent_ids = self.nodes_parent_ids_vec[child_nodes_idx]
+        order = np.argsort(child_parent_ids, kind='stable')
+        self.children_idx_vec = child_nodes_idx[order]
+        counts = np.bincount(child_parent_ids, minlength=max_id + 1)
+        self.children_offsets_vec = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        # position of each node among its siblings
+        self.nodes_sibling_pos_vec = np.zeros(n, dtype=np.int64)
+        self.nodes_sibling_pos_vec[self.children_idx_vec] = \
+            np.arange(len(self.children_idx_vec)) - self.children_offsets_vec[child_parent_ids[order]]
+
+        # ordinal of each node among its siblings with the same tag (1-based, as in :nth-of-type)
+        self.nodes_sibling_of_type_vec = np.ones(n, dtype=np.int64)
+        if len(child_nodes_idx) > 0:
+            order = np.lexsort((child_nodes_idx, self.nodes_tags_vec[child_nodes_idx], child_parent_ids))
+            sorted_idx = child_nodes_idx[order]
+            sorted_keys = np.stack([child_parent_ids[order], self.nodes_tags_vec[sorted_idx]], axis=1)
+            group_start = np.ones(len(sorted_idx), dtype=bool)
+            group_start[1:] = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+            group_start_pos = np.maximum.accumulate(np.where(group_start, np.arange(len(sorted_idx)), 0))
+            self.nodes_sibling_of_type_vec[sorted_idx] = np.arange(len(sorted_idx)) - group_start_pos + 1
+
+        # subtree end (exclusive), propagated from the deepest nodes up to their parents
+        self.nodes_subtree_end_vec = np.arange(1, n + 1, dtype=np.int64)
+        child_nodes_idx = np.flatnonzero(self.nodes_parent_idx_vec >= 0)
+        child_depth = self.nodes_depth_vec[child_nodes_idx]
+        for d in range(child_depth.max(initial=0), 0, -1):
+            level_idx = child_nodes_idx[child_depth == d]
+            np.maximum.at(self.nodes_subtree_end_vec, self.nodes_parent_idx_vec[level_idx],
+                          self.nodes_subtree_end_vec[level_idx])
+
+    def _get_node_siblings_idx(self, idx: int) -> np.ndarray:
+        parent_id = self.nodes_parent_ids_vec[idx]
+        if parent_id < 0:
+            return np.array([idx], dtype=np.int64)
+        return self.children_idx_vec[self.children_offsets_vec[parent_id]:self.children_offsets_vec[parent_id + 1]]
+
+    def _get_node_previous_siblings_of_type_idx(self, idx: int) -> np.ndarray:
+        siblings_idx = self._get_node_siblings_idx(idx)[:self.nodes_sibling_pos_vec[idx]]
+        return siblings_idx[self.nodes_tags_vec[siblings_idx] == self.nodes_tags_vec[idx]]
 
     def load_texts(self):
         self._nodes_texts = [n.text for n in self.nodes_]
         self.nodes_text_length_vec = np.array([len(t or []) for t in self._nodes_texts])
 
-    def run(self):
+    def load_structure(self):
+        """Nodes, index, soup and texts (enough to fingerprint the page and apply selectors)."""
         self.load_graph_data()
-        self.load_tensors()
-        self.load_dgl_graph()
-        self.load_embeddings()
+        self.load_index()
         self.load_soup()
         self.load_texts()
 
+    def load_features(self):
+        """Features matrix and embeddings (needed by detection only), loaded once."""
+        if self._features_loaded:
+            return
+        self.load_tensors()
+        if self.embed_backend == EMBED_BACKEND_DGL:
+            self.load_dgl_graph()
+        self.load_embeddings()
+        self._features_loaded = True
+
+    def run(self):
+        self.load_structure()
+        self.load_features()
+
+    @property
+    def template_fingerprint(self) -> str:
+        if self._template_fingerprint is None:
+            self._template_fingerprint = get_template_fingerprint(self.node_table, self.fingerprint_depth)
+        return self._template_fingerprint
+
     @property
     def nodes(self):
         return np.array(self.nodes_)
@@ -261,19 +438,54 @@ class GraphLoader(object):
         return [self.get_node_by_id(id) for id in ids]
 
     def get_node_children_recursive_by_id(self, id: int) -> List[Node]:
-        idx = self.node_ids_enc.transform([id])[0]
+        idx = self.nodes_id_to_idx_vec[id]
         child_nodes_idx = self.get_node_children_idx_recursive_by_id(id)
-        child_ids = self.node_ids_enc.inverse_transform([nid for nid in child_nodes_idx if nid != idx])
-        return self.get_nodes_by_ids(child_ids)
+        return [self.nodes_[i] for i in child_nodes_idx if i != idx]
 
     def get_node_children_idx_recursive_by_id(self, id: int) -> np.ndarray:
-        idx = self.node_ids_enc.transform([id])[0]
+        idx = self.nodes_id_to_idx_vec[id]
         return self.get_node_children_idx_recursive_by_idx(idx)
 
     def get_node_children_idx_recursive_by_idx(self, idx: int) -> np.ndarray:
-        successors = dfs_successors(G=self.g_nx, source=idx, depth_limit=self.dfs_depth)
-        child_nodes_idx = [item for sublist in successors.values() for item in sublist]
-        return np.array(list(child_nodes_idx))
+        # descendants within the subtree range and the depth limit
+        child_nodes_idx = np.arange(idx + 1, self.nodes_subtree_end_vec[idx])
+        mask = (self.nodes_root_idx_vec[child_nodes_idx] == self.nodes_root_idx_vec[idx]) & \
+               (self.nodes_depth_vec[child_nodes_idx] <= self.nodes_depth_vec[idx] + self.dfs_depth)
+        child_nodes_idx = child_nodes_idx[mask]
+
+        # grouped by parent (parents in preorder) and in document order within each group
+        return child_nodes_idx[np.argsort(self.nodes_parent_idx_vec[child_nodes_idx], kind='stable')]
+
+    def get_nodes_descendants_text_stats(self, nodes_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Total text length and number of descendants with text of each node, and whether it has any
+        descendants, within the same root and the depth limit (as get_node_children_idx_recursive_by_idx).
+        Computed for all nodes at once from cumulative sums over the preorder (one per distinct root
+        and depth limit).
+        """
+        nodes_idx = np.asarray(nodes_idx, dtype=np.int64)
+        start_vec = nodes_idx + 1
+        end_vec = self.nodes_subtree_end_vec[nodes_idx]
+        max_depth_vec = self.nodes_depth_vec[nodes_idx] + self.dfs_depth
+        root_idx_vec = self.nodes_root_idx_vec[nodes_idx]
+
+        text_length_vec = np.zeros(len(nodes_idx), dtype=np.int64)
+        text_count_vec = np.zeros(len(nodes_idx), dtype=np.int64)
+        descendants_count_vec = np.zeros(len(nodes_idx), dtype=np.int64)
+        for root_idx, max_depth in np.unique(np.stack([root_idx_vec, max_depth_vec], axis=1), axis=0):
+            mask = (root_idx_vec == root_idx) & (max_depth_vec == max_depth)
+
+            # nodes whose parent was escaped have their own root, and are not descendants
+            included = (self.nodes_root_idx_vec == root_idx) & (self.nodes_depth_vec <= max_depth)
+            lengths = np.where(included, self.nodes_text_length_vec, 0)
+            lengths_cumsum = np.concatenate([[0], np.cumsum(lengths)])
+            counts_cumsum = np.concatenate([[0], np.cumsum(lengths > 0)])
+            included_cumsum = np.concatenate([[0], np.cumsum(included)])
+            text_length_vec[mask] = lengths_cumsum[end_vec[mask]] - lengths_cumsum[start_vec[mask]]
+            text_count_vec[mask] = counts_cumsum[end_vec[mask]] - counts_cumsum[start_vec[mask]]
+            descendants_count_vec[mask] = included_cumsum[end_vec[mask]] - included_cumsum[start_vec[mask]]
+
+        return text_length_vec, text_count_vec, descendants_count_vec > 0
 
     def get_node_text_length(self, n: Node, max_length: int = 1024) -> int:
         selector = self.get_node_css_selector_path(n)
@@ -283,12 +495,76 @@ class GraphLoader(object):
         return min(len(el.text), max_length)
 
     def get_node_children_by_id(self, id: int) -> List[Node]:
-        return [n for n in self.nodes_ if n.parent_id == id]
+        if id is None or id < 0 or id + 1 >= len(self.children_offsets_vec):
+            return []
+        children_idx = self.children_idx_vec[self.children_offsets_vec[id]:self.children_offsets_vec[id + 1]]
+        return [self.nodes_[i] for i in children_idx]
+
+    @property
+    def nodes_features_tensor(self):
+        """
+        Dense nodes features tensor (requires torch). Prefer `nodes_features_mat`, as this
+        materializes the whole (nodes x features) matrix.
+        """
+        if self._nodes_features_tensor is None:
+            import torch
+            self._nodes_features_tensor = torch.tensor(data=self.nodes_features_mat.toarray(), dtype=torch.float32)
+        return self._nodes_features_tensor
+
+    @property
+    def nodes_features_count_vec(self) -> np.ndarray:
+        """
+        number of nodes associated to each feature
+        """
+        if self._nodes_features_count_vec is None:
+            self._nodes_features_count_vec = np.asarray(self.nodes_features_mat.sum(axis=0)).ravel()
+        return self._nodes_features_count_vec
+
+    @property
+    def pruned_features_idx(self) -> np.ndarray:
+        """
+        indexes of features associated to more than one node (columns of pruned_nodes_features)
+        """
+        if self._pruned_features_idx is None:
+            self._pruned_features_idx = np.flatnonzero(self.nodes_features_count_vec > 1)
+        return self._pruned_features_idx
+
+    @property
+    def pruned_nodes_features(self) -> csr_matrix:
+        """
+        nodes features without features associated to only one node, computed once and shared by detectors
+        """
+        if self._pruned_nodes_features is None:
+            self._pruned_nodes_features = self.nodes_features_mat[:, self.pruned_features_idx]
+        return self._pruned_nodes_features
+
+    @property
+    def nodes_walks_incidence_mat(self) -> csr_matrix:
+        """
+        (walks x nodes) sparse matrix counting the visits of each node by the walk starting from each node
+        """
+        if self._nodes_walks_incidence_mat is None:
+            walks = self.nodes_walks_vec
+            n_walks, n_steps = walks.shape
+            n_nodes = len(self.nodes_)
+
+            # walks are padded with -1 after reaching a leaf, which (as with numpy indexing) refers to the last node
+            walks = np.where(walks < 0, walks + n_nodes, walks)
+
+            # duplicated (walk, node) entries are summed up into visit counts
+            self._nodes_walks_incidence_mat = csr_matrix(
+                (
+                    np.ones(walks.size, dtype=np.float32),
+                    (np.repeat(np.arange(n_walks), n_steps), walks.ravel()),
+                ),
+                shape=(n_walks, n_nodes),
+            )
+        return self._nodes_walks_incidence_mat
 
     @property
     def unique_features_idx(self):
         # features counts vector
-        features_counts = self.nodes_features_tensor.detach().numpy().sum(axis=0)
+        features_counts = self.nodes_features_count_vec
 
         # indexes of features each of which is associated to only one node
         unique_features_idx = np.where(features_counts == 1)
@@ -297,9 +573,9 @@ class GraphLoader(object):
 
     @property
     def available_features_idx(self):
-        available_features = [f for f in self.nodes_features_enc.feature_names_
+        available_features = [f for f in self.nodes_features_names
                               if f.split('=')[0] in self.available_feature_keys]
-        available_features_mask = np.isin(self.nodes_features_enc.feature_names_, np.array(available_features))
+        available_features_mask = np.isin(self.nodes_features_names, np.array(available_features))
         available_features_idx = np.argwhere(available_features_mask).T
 
         return available_features_idx
@@ -313,16 +589,16 @@ class GraphLoader(object):
         """
         2-dimensional node-feature pairs index
         """
-        nodes_feat = self.nodes_features_tensor.detach().numpy()
-        uniq_avail_nodes_feat = np.zeros(nodes_feat.shape)
         uniq_idx = self.unique_available_features_idx
-        uniq_avail_nodes_feat[:, uniq_idx] = nodes_feat[:, uniq_idx]
-        return np.argwhere(uniq_avail_nodes_feat > 0)
+        uniq_nodes_feat = self.nodes_features_mat[:, uniq_idx].tocoo()
+        mask = uniq_nodes_feat.data > 0
+        pairs_idx = np.stack([uniq_nodes_feat.row[mask], uniq_idx[uniq_nodes_feat.col[mask]]], axis=1)
+        return pairs_idx[np.lexsort((pairs_idx[:, 1], pairs_idx[:, 0]))]
 
     @property
     def unique_node_feature_pairs(self):
         nodes = self.nodes[self.unique_node_feature_pairs_idx[:, 0]].tolist()
-        feats = np.array(self.nodes_features_enc.feature_names_)[self.unique_node_feature_pairs_idx[:, 1]].tolist()
+        feats = np.array(self.nodes_features_names)[self.unique_node_feature_pairs_idx[:, 1]].tolist()
         return [(n, f) for n, f in zip(nodes, feats)]
 
     @property
@@ -333,31 +609,37 @@ class GraphLoader(object):
         return self._unique_node_feature_id_dict
 
     def _get_node_previous_siblings(self, node: Node) -> List[Node]:
-        return [n for n in self.nodes_ if n.parent_id == node.parent_id
-                and n.id < node.id
-                and n.feature_tag == node.feature_tag]
+        idx = self.nodes_id_to_idx_vec[node.id]
+        return [self.nodes_[i] for i in self._get_node_previous_siblings_of_type_idx(idx)]
 
     def _get_node_previous_siblings_with_classes(self, node: Node) -> List[Node]:
+        idx = self.nodes_id_to_idx_vec[node.id]
         node_feature_classes_set = set(node.feature_classes)
-        return [n for n in self.nodes_ if n.parent_id == node.parent_id
-                and n.id < node.id
-                and n.feature_tag == node.feature_tag
-                and node_feature_classes_set.issubset(set(n.feature_classes))]
+        return [self.nodes_[i] for i in self._get_node_previous_siblings_of_type_idx(idx)
+                if node_feature_classes_set.issubset(set(self.nodes_[i].feature_classes))]
 
     def _is_node_last_child(self, node: Node) -> bool:
-        parent = self.get_node_by_id(node.parent_id)
-        children = self.get_node_children_by_id(parent.id)
-        return node.id == children[-1].id
+        idx = self.nodes_id_to_idx_vec[node.id]
+        return self._get_node_siblings_idx(idx)[-1] == idx
 
-    def get_node_css_selector_repr(self, node: Node, numbered: bool = True, no_id: bool = False) -> str:
-        if numbered:
-            return self._get_node_css_selector_repr(node, numbered, no_id)
+    @property
+    def css_selector_cache_info(self) -> Dict[str, dict]:
+        return {
+            'repr': self.css_selector_repr_cache_stats.dict(),
+            'path': self.css_selector_path_cache_stats.dict(),
+        }
 
-        if self._css_selector_repr_cache.get(node.id):
-            return self._get_node_css_selector_repr(node, numbered, no_id)
+    def get_node_css_selector_repr(self, node: Node, numbered: bool = True, no_id: bool = False) -> str:
+        key = (node.id, numbered, no_id)
+        css_selector_repr = self._css_selector_repr_cache.get(key)
+        if css_selector_repr is not None:
+            self.css_selector_repr_cache_stats.hit()
+            return css_selector_repr
 
-        self._css_selector_repr_cache[node.id] = self._get_node_css_selector_repr(node, numbered, no_id)
-        return self._css_selector_repr_cache.get(node.id)
+        self.css_selector_repr_cache_stats.miss()
+        css_selector_repr = self._get_node_css_selector_repr(node, numbered, no_id)
+        self._css_selector_repr_cache[key] = css_selector_repr
+        return css_selector_repr
 
     def _get_node_css_selector_repr(self, node: Node, numbered: bool = True, no_id: bool = False) -> str:
         # id
@@ -378,7 +660,7 @@ class GraphLoader(object):
         # tag
         else:
             if numbered:
-                length = len(self._get_node_previous_siblings(node)) + 1
+                length = self.nodes_sibling_of_type_vec[self.nodes_id_to_idx_vec[node.id]]
                 if length > 1:
                     if self._is_node_last_child(node):
                         return f'{node.feature_tag}:last-child'
@@ -397,37 +679,62 @@ class GraphLoader(object):
 
     def get_node_css_selector_path(self, node: Node, root_id: int = None, numbered: bool = True,
                                    no_id: bool = False) -> str:
+        # css selector repr of the node itself
+        css_selector_repr = self.get_node_css_selector_repr(node=node, numbered=numbered, no_id=no_id)
+
         # return if no parent
         if node.parent_id is None:
-            return self.get_node_css_selector_repr(node=node, numbered=numbered, no_id=no_id)
+            return css_selector_repr
 
-        # css selector path
-        path = [self.get_node_css_selector_repr(node=node, numbered=numbered, no_id=no_id)]
+        # css selector path of ancestors (shared by all nodes with the same parent)
+        prefix = self._get_node_css_selector_path_prefix(node.parent_id, root_id, numbered, no_id)
+        if prefix is None:
+            return css_selector_repr
 
-        # iterate node parent until reaching end condition
-        while node.parent_id is not None:
-            # parent
-            parent = self.get_node_by_id(node.parent_id)
+        return f'{prefix} > {css_selector_repr}'
 
-            # end if parent is root
-            if root_id is not None and parent.id == root_id:
+    def _get_node_css_selector_path_prefix(self, parent_id: int, root_id: Optional[int], numbered: bool,
+                                           no_id: bool) -> Optional[str]:
+        """
+        Css selector path that precedes the children of the given parent, memoized by
+        (parent id, root id, numbered, no_id). Ancestors are iterated until reaching a cached
+        prefix, the root or a unique-feature ancestor, and the prefixes of the traversed
+        ancestors are then cached on the way back.
+        """
+        prefix = None
+        chain: List[Tuple[Tuple[int, Optional[int], bool, bool], Node]] = []
+        while parent_id is not None:
+            key = (parent_id, root_id, numbered, no_id)
+
+            # cached prefix
+            if key in self._css_selector_path_cache:
+                self.css_selector_path_cache_stats.hit()
+                prefix = self._css_selector_path_cache[key]
                 break
+            self.css_selector_path_cache_stats.miss()
 
-            # end if no parent
-            if parent is None:
+            # parent
+            parent = self.get_node_by_id(parent_id)
+
+            # end if no parent or parent is root
+            if parent is None or parent.id == root_id:
+                self._css_selector_path_cache[key] = None
                 break
 
+            # add to chain
+            chain.append((key, parent))
+
             # end if parent node is unique-feature
             if not no_id and self.unique_node_feature_id_dict.get(parent.id) is not None:
-                feat = self.unique_node_feature_id_dict.get(parent.id)
-                path.insert(0, self.get_node_css_selector_repr(parent, numbered=numbered, no_id=no_id))
                 break
 
-            # add to path
-            parent_path = self.get_node_css_selector_repr(parent, numbered=numbered, no_id=no_id)
-            path.insert(0, parent_path)
+            # set to grandparent
+            parent_id = parent.parent_id
 
-            # set node to its parent
-            node = parent
+        # build prefixes from the top-most ancestor down
+        for key, parent in reversed(chain):
+            parent_path = self.get_node_css_selector_repr(parent, numbered=numbered, no_id=no_id)
+            prefix = parent_path if prefix is None else f'{prefix} > {parent_path}'
+            self._css_selector_path_cache[key] = prefix
 
-        return ' > '.join(path)
+        return prefix
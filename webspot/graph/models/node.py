@@ -1,26 +1,37 @@
-import re
 from typing import Tuple, List, Dict, Optional
 
 
-class Node(dict):
+class Node(object):
+    """
+    Lightweight view of a node (row `idx`) of a NodeTable.
+    """
+    __slots__ = ('table', 'idx')
+
+    def __init__(self, table, idx: int):
+        self.table = table
+        self.idx = idx
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.table is other.table and self.idx == other.idx
+
+    def __hash__(self):
+        return hash((id(self.table), self.idx))
+
+    def __repr__(self):
+        return f'Node(id={self.id}, tag={self.tag})'
+
     @property
     def id(self) -> int:
-        return self.get('id')
+        return int(self.table.ids[self.idx])
 
     @property
     def parent_id(self):
-        return self.get('parent_id')
+        parent_id = self.table.parent_ids[self.idx]
+        return None if parent_id < 0 else int(parent_id)
 
     @property
     def features(self) -> Tuple[Tuple[str, str]]:
-        features: List[Tuple[str, str]] = []
-        for k, v in self.get('features'):
-            # skip pseudo-classes
-            if k == 'class':
-                if ':' in v:
-                    continue
-            features.append((k, v))
-        return tuple(features)
+        return self.table.features[self.table.features_codes[self.idx]]
 
     @property
     def features_dict(self) -> Dict[str, int]:
@@ -28,32 +39,21 @@ class Node(dict):
 
     @property
     def feature_tag(self) -> Optional[str]:
-        for k, v in self.features:
-            if k == 'tag':
-                return v
-        return None
+        code = self.table.tag_codes[self.idx]
+        return None if code < 0 else self.table.tags[code]
 
     @property
     def feature_classes(self) -> List[str]:
-        classes = []
-        for k, v in self.features:
-            if k == 'class':
-                # css parser cannot parse class starting with a digit
-                if re.search(r'^\d', v) is not None:
-                    continue
-                classes.append(v)
-        return classes
+        return list(self.table.classes[self.table.classes_codes[self.idx]])
 
     @property
     def feature_id(self) -> Optional[str]:
-        for k, v in self.features:
-            if k == 'id':
-                return v
-        return None
+        code = self.table.id_codes[self.idx]
+        return None if code < 0 else self.table.id_values[code]
 
     @property
     def text(self) -> str:
-        return self.get('text')
+        return self.table.texts[self.idx]
 
     @property
     def tag(self):
@@ -62,3 +62,11 @@ class Node(dict):
     @property
     def attrs(self):
         return {k: v for k, v in self.features if k != 'tag'}
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'parent_id': self.parent_id,
+            'features': [list(f) for f in self.features],
+            'text': self.text,
+        }
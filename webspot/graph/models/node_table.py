@@ -0,0 +1,121 @@
+import re
+from typing import List, Tuple, Dict, Optional
+
+import numpy as np
+
+from webspot.graph.models.node import Node
+
+
+class NodeTable(object):
+    """
+    Columnar store of the nodes of a graph, appended in preorder and viewed through `Node`.
+
+    Per-node columns (id, parent id, parent index, root index, depth, tag code, id code,
+    classes code and features code) are arrays, while tags, ids, class lists and feature
+    lists are interned, so that nodes sharing them (e.g. list items) share the same objects.
+    """
+
+    def __init__(self):
+        # per-node columns
+        self.ids: List[int] = []
+        self.parent_ids: List[int] = []
+        self.parent_idx: List[int] = []
+        self.root_idx: List[int] = []
+        self.depth: List[int] = []
+        self.tag_codes: List[int] = []
+        self.id_codes: List[int] = []
+        self.classes_codes: List[int] = []
+        self.features_codes: List[int] = []
+        self.texts: List[Optional[str]] = []
+
+        # interned tables
+        self.tags: List[str] = []
+        self.id_values: List[str] = []
+        self.classes: List[Tuple[str, ...]] = []
+        self.features: List[Tuple[Tuple[str, str], ...]] = []
+
+        # views
+        self.nodes: List[Node] = []
+
+        # internals
+        self._ids_idx_dict: Dict[int, int] = {}
+        self._tags_dict: Dict[str, int] = {}
+        self._id_values_dict: Dict[str, int] = {}
+        self._classes_dict: Dict[Tuple[str, ...], int] = {}
+        self._features_dict: Dict[Tuple[Tuple[str, str], ...], int] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _intern(value, table: list, table_dict: dict) -> int:
+        code = table_dict.get(value)
+        if code is None:
+            code = len(table)
+            table.append(value)
+            table_dict[value] = code
+        return code
+
+    def append(self, id: int, parent_id: Optional[int], features: List[Tuple[str, str]],
+               text: Optional[str] = None) -> Node:
+        idx = len(self.ids)
+
+        # skip node ids (unique to each node, and already in ids; selectors read them from the document),
+        # so that feature lists of nodes sharing attributes are interned once, and pseudo-classes
+        features = tuple((k, v) for k, v in features if k != 'node-id' and (k != 'class' or ':' not in v))
+
+        # tag, id and classes
+        tag = None
+        id_value = None
+        classes = []
+        for k, v in features:
+            if k == 'tag':
+                if tag is None:
+                    tag = v
+            elif k == 'id':
+                if id_value is None:
+                    id_value = v
+            elif k == 'class':
+                # css parser cannot parse class starting with a digit
+                if re.search(r'^\d', v) is not None:
+                    continue
+                classes.append(v)
+
+        # parent index (-1 if the parent is not a node), root index and depth
+        parent_idx = self._ids_idx_dict.get(parent_id, -1)
+        if parent_idx >= 0:
+            root_idx = self.root_idx[parent_idx]
+            depth = self.depth[parent_idx] + 1
+        else:
+            root_idx = idx
+            depth = 0
+
+        self.ids.append(id)
+        self.parent_ids.append(-1 if parent_id is None else parent_id)
+        self.parent_idx.append(parent_idx)
+        self.root_idx.append(root_idx)
+        self.depth.append(depth)
+        self.tag_codes.append(-1 if tag is None else self._intern(tag, self.tags, self._tags_dict))
+        self.id_codes.append(-1 if id_value is None else self._intern(id_value, self.id_values,
+                                                                      self._id_values_dict))
+        self.classes_codes.append(self._intern(tuple(classes), self.classes, self._classes_dict))
+        self.features_codes.append(self._intern(features, self.features, self._features_dict))
+        self.texts.append(text)
+        self._ids_idx_dict[id] = idx
+
+        node = Node(self, idx)
+        self.nodes.append(node)
+        return node
+
+    def build(self):
+        """Convert per-node columns to arrays once all nodes are appended."""
+        self.ids = np.array(self.ids, dtype=np.int64)
+        self.parent_ids = np.array(self.parent_ids, dtype=np.int64)
+        self.parent_idx = np.array(self.parent_idx, dtype=np.int64)
+        self.root_idx = np.array(self.root_idx, dtype=np.int64)
+        self.depth = np.array(self.depth, dtype=np.int64)
+        self.tag_codes = np.array(self.tag_codes, dtype=np.int64)
+        self.id_codes = np.array(self.id_codes, dtype=np.int64)
+        self.classes_codes = np.array(self.classes_codes, dtype=np.int64)
+        self.features_codes = np.array(self.features_codes, dtype=np.int64)
+        self._ids_idx_dict = {}
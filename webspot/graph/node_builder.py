@@ -0,0 +1,78 @@
+from itertools import chain
+from typing import List, Tuple, Optional, Iterator, Iterable
+
+from bs4 import BeautifulSoup, Tag, NavigableString
+
+NodeRecord = Tuple[int, Optional[int], List[Tuple[str, str]], Optional[str]]
+
+
+def get_root_tag(soup: BeautifulSoup) -> Tag:
+    """First top-level tag of the document (root of node ids, as in html_to_json_enhanced)."""
+    for el in soup.contents:
+        if isinstance(el, Tag):
+            return el
+    raise ValueError('No tags found in html section')
+
+
+def assign_node_ids(root: Tag) -> int:
+    """
+    Assign node ids ("node-id" attribute) to the root tag and its descendant tags in preorder,
+    same as html_to_json_enhanced. Returns the number of tags.
+    """
+    node_id = 0
+    for el in chain([root], root.descendants):
+        if isinstance(el, Tag):
+            el.attrs['node-id'] = node_id
+            node_id += 1
+    return node_id
+
+
+def get_node_features(tag: str, attributes: Optional[dict]) -> List[Tuple[str, str]]:
+    # tags
+    features = [('tag', tag)]
+
+    # attributes
+    if attributes is not None:
+        for key, value in attributes.items():
+            if isinstance(value, list):
+                for v in value:
+                    features.append((key, v))
+            else:
+                features.append((key, value))
+
+    return features
+
+
+def get_node_text(el: Tag) -> Optional[str]:
+    """Text of the direct strings of the tag, as "_text" / "_texts" in html_to_json_enhanced."""
+    texts = [s.strip() for s in el.contents if isinstance(s, NavigableString)]
+    texts = [t for t in texts if t != '']
+    if len(texts) == 0:
+        return None
+    return ' '.join(texts)
+
+
+def iterate_node_records(root: Tag, escaped_tag_names: Iterable[str]) -> Iterator[NodeRecord]:
+    """
+    Node records (id, parent id, features, text) of the root tag and its descendants in preorder,
+    built from the parsed document with node ids (not a streaming parse: the document is parsed
+    once, and its soup is needed anyway for selectors), without building intermediate json data.
+
+    Escaped tags are skipped without reading their features or texts, but their subtrees are still
+    walked: descendant tags are checked by name, and those that are not escaped themselves (e.g. a
+    title in an svg) are kept with the id of the escaped parent, same as filtering the json nodes.
+    """
+    escaped_tag_names = set(escaped_tag_names)
+    for el in chain([root], root.descendants):
+        if not isinstance(el, Tag) or el.name in escaped_tag_names:
+            continue
+
+        parent = el.parent
+        parent_id = parent.attrs.get('node-id') if parent is not None else None
+
+        yield (
+            el.attrs.get('node-id'),
+            parent_id,
+            get_node_features(el.name, el.attrs),
+            get_node_text(el),
+        )
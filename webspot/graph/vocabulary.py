@@ -0,0 +1,131 @@
+import os
+import threading
+from typing import List, Tuple, Dict, Optional, Iterable, Set
+
+import numpy as np
+
+from webspot.logging import get_logger
+from webspot.utils.cache import CacheStats
+
+logger = get_logger('webspot.graph.vocabulary')
+
+FEATURE_VOCABULARY_MAX_SIZE = int(os.environ.get('WEBSPOT_FEATURE_VOCABULARY_MAX_SIZE', 1000000))
+
+
+class FeatureVocabulary(object):
+    """
+    Process-wide vocabulary of node features (key, value), e.g. ("class", "item").
+
+    Feature keys and features are interned to integer ids, and feature names ("key=value")
+    are formatted only once, so that pages from the same sites mostly resolve to integer
+    lookups. The vocabulary is bounded: when it grows beyond `max_size`, the least recently
+    used features are evicted and ids are reassigned (a new generation). This only happens
+    at the start of `encode`, as ids are never exposed outside of it.
+    """
+
+    def __init__(self, max_size: int = FEATURE_VOCABULARY_MAX_SIZE):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.pages = 0
+
+        # feature keys
+        self.keys: List[str] = []
+        self.keys_ids: Dict[str, int] = {}
+
+        # features
+        self.features_keys_ids: List[int] = []
+        self.features_names: List[str] = []
+        self.features_ids: Dict[Tuple[str, str], int] = {}
+        self._features_last_used: List[int] = []
+
+        # stats
+        self.stats = CacheStats()
+
+    def __len__(self):
+        return len(self.features_names)
+
+    def _intern_key(self, key: str) -> int:
+        key_id = self.keys_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            self.keys.append(key)
+            self.keys_ids[key] = key_id
+        return key_id
+
+    def _intern(self, key: str, value: str) -> int:
+        feature_id = self.features_ids.get((key, value))
+        if feature_id is not None:
+            self.stats.hit()
+            return feature_id
+
+        self.stats.miss()
+        feature_id = len(self.features_names)
+        self.features_keys_ids.append(self._intern_key(key))
+        self.features_names.append(f'{key}={value}')
+        self.features_ids[(key, value)] = feature_id
+        self._features_last_used.append(self.pages)
+        return feature_id
+
+    def _evict(self):
+        """Keep the most recently used half of max size, reassigning ids."""
+        n_keep = self.max_size // 2
+        last_used = np.array(self._features_last_used)
+        keep = np.sort(np.argsort(-last_used, kind='stable')[:n_keep]).tolist()
+        new_ids = {feature_id: i for i, feature_id in enumerate(keep)}
+
+        # keys are few, so they are kept
+        logger.debug(f'feature vocabulary: evicted {len(self) - len(keep)} features '
+                     f'(generation {self.generation + 1})')
+        self.features_keys_ids = [self.features_keys_ids[i] for i in keep]
+        self.features_names = [self.features_names[i] for i in keep]
+        self.features_ids = {k: new_ids[i] for k, i in self.features_ids.items() if i in new_ids}
+        self._features_last_used = [self._features_last_used[i] for i in keep]
+        self.generation += 1
+
+    def encode(
+        self,
+        features_list: Iterable[Iterable[Tuple[str, str]]],
+        keys: Optional[Set[str]] = None,
+    ) -> Tuple[List[np.ndarray], List[str]]:
+        """
+        Encode lists of (key, value) features (e.g. one per node) of a page.
+
+        Returns, for each list, the sorted unique columns of its features, and the names of the
+        columns. Columns are local to the page and sorted by name (as in DictVectorizer).
+        Features whose keys are not in `keys` (if given) are skipped.
+        """
+        with self.lock:
+            if len(self) > self.max_size:
+                self._evict()
+            self.pages += 1
+
+            # feature ids of each list
+            ids_list: List[Set[int]] = []
+            for features in features_list:
+                ids_list.append({self._intern(k, v) for k, v in features if keys is None or k in keys})
+
+            # page features sorted by name
+            page_ids = sorted(set().union(*ids_list), key=lambda i: self.features_names[i])
+            names = [self.features_names[i] for i in page_ids]
+            for i in page_ids:
+                self._features_last_used[i] = self.pages
+
+        # page-local columns
+        columns = {feature_id: j for j, feature_id in enumerate(page_ids)}
+        columns_list = [np.array(sorted(columns[i] for i in ids), dtype=np.int64) for ids in ids_list]
+
+        return columns_list, names
+
+    def dict(self) -> dict:
+        return {
+            'size': len(self),
+            'keys': len(self.keys),
+            'generation': self.generation,
+            'pages': self.pages,
+            **self.stats.dict(),
+        }
+
+
+# vocabulary shared by graph loaders of the process
+feature_vocabulary = FeatureVocabulary()
@@ -0,0 +1,45 @@
+from typing import Optional
+
+import numpy as np
+
+
+def random_walk(
+    offsets_start: np.ndarray,
+    offsets_end: np.ndarray,
+    indices: np.ndarray,
+    nodes: np.ndarray,
+    walk_length: int,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Uniform random walks (as node2vec with p = q = 1) over a CSR graph.
+
+    The graph is the directed parent -> children tree, where node2vec return (p) and in-out (q)
+    biases do not apply (the previous node is never a neighbor of the next one), hence no p and q.
+
+    Out-neighbors of node `i` are `indices[offsets_start[i]:offsets_end[i]]`. One walk of
+    `walk_length` steps is started from each of `nodes`, and the returned (nodes x walk_length + 1)
+    array is padded with -1 once a walk reaches a node without out-neighbors (as in DGL).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    nodes = np.asarray(nodes, dtype=np.int64)
+    walks = np.full((len(nodes), walk_length + 1), -1, dtype=np.int64)
+    walks[:, 0] = nodes
+
+    # walks that have not reached a leaf yet
+    alive = np.arange(len(nodes))
+    cur = nodes
+    for step in range(1, walk_length + 1):
+        start = offsets_start[cur]
+        degree = offsets_end[cur] - start
+        mask = degree > 0
+        alive, cur, start, degree = alive[mask], cur[mask], start[mask], degree[mask]
+        if len(alive) == 0:
+            break
+
+        # pick one out-neighbor uniformly
+        cur = indices[start + (rng.random(len(alive)) * degree).astype(np.int64)]
+        walks[alive, step] = cur
+
+    return walks
+
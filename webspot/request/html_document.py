@@ -0,0 +1,60 @@
+import copy
+from typing import Optional
+
+from bs4 import BeautifulSoup, Tag
+from html_to_json_enhanced.convert_html import HtmlConverter
+
+from webspot.graph.node_builder import get_root_tag, assign_node_ids
+
+
+class HtmlDocument(object):
+    """
+    Parsed html document shared by every stage of a detection run.
+
+    The html is parsed only once (html.parser) and node ids are assigned to the
+    elements ("node-id" attribute). Stages that only read the document use `soup`
+    directly, while stages that modify it (e.g. highlighting) work on `copy_soup()`.
+    The json representation is only converted when accessed.
+    """
+
+    def __init__(self, html: str):
+        # soup
+        self.soup: BeautifulSoup = BeautifulSoup(html, 'html.parser')
+
+        # root tag and node ids
+        self.root: Tag = get_root_tag(self.soup)
+        assign_node_ids(self.root)
+
+        # internals
+        self._html: Optional[str] = None
+        self._json_data: Optional[dict] = None
+
+    @property
+    def html(self) -> str:
+        """Html with node ids, serialized once."""
+        if self._html is None:
+            self._html = str(self.soup)
+        return self._html
+
+    @property
+    def json_data(self) -> dict:
+        """Json data (html_to_json_enhanced) with the same node ids, converted once."""
+        if self._json_data is None:
+            self._json_data = HtmlConverter(self.html).convert()
+        return self._json_data
+
+    def copy_soup(self) -> BeautifulSoup:
+        """
+        Copy of the soup that can be modified freely. Elements are copied
+        structurally, which is cheaper than parsing the html again.
+        """
+        soup = BeautifulSoup('', 'html.parser')
+        for el in self.soup.contents:
+            el_copy = copy.copy(el)
+            # some bs4 versions drop falsy attribute values (e.g. node-id 0) when copying
+            if isinstance(el, Tag):
+                for key, value in el.attrs.items():
+                    if key not in el_copy.attrs:
+                        el_copy.attrs[key] = str(value)
+            soup.append(el_copy)
+        return soup
@@ -4,15 +4,14 @@ import os
 from typing import Optional
 from urllib.parse import urlparse
 
-import html_to_json_enhanced
 import httpx
-from html_to_json_enhanced.convert_html import HtmlConverter
-from httpx import Timeout
-from requests import Response
+from httpx import Timeout, Response
 from retrying import retry
 
 from webspot.constants.html_request_method import HTML_REQUEST_METHOD_REQUEST, HTML_REQUEST_METHOD_ROD
-from webspot.detect.utils.transform_html_links import transform_html_links
+from webspot.detect.utils.transform_html_links import transform_html_links, transform_soup_links
+from webspot.request.html_document import HtmlDocument
+from webspot.request.http_client import AsyncHttpClient, http_client as default_http_client
 
 DEFAULT_REQUEST_ROD_URL = 'http://localhost:7777/request'
 DEFAULT_REQUEST_ROD_DURATION = 5
@@ -29,6 +28,7 @@ class HtmlRequester(object):
         request_rod_url: str = DEFAULT_REQUEST_ROD_URL,
         request_rod_duration: int = DEFAULT_REQUEST_ROD_DURATION,
         save: bool = False,
+        http_client: AsyncHttpClient = None,
     ):
         # settings
         self.url = url
@@ -37,18 +37,18 @@ class HtmlRequester(object):
         self.request_rod_url = request_rod_url
         self.request_rod_duration = request_rod_duration
         self.save = save
+        self.http_client = http_client if http_client is not None else default_http_client
         self.encodings = ['utf-8', 'gbk', 'iso-8859-1', 'cp1252']
 
         # data
         self.html_: Optional[str] = html
         self.html_response: Optional[Response] = None
-        self.json_data: Optional[dict] = None
 
         # logger
         self.logger = logging.getLogger('webspot.request.html_requester')
 
-        # html converter
-        self.html_converter: Optional[HtmlConverter] = None
+        # parsed html document (shared across graph loader and detectors)
+        self.document: Optional[HtmlDocument] = None
 
     def _decode_response_content(self, res: Response) -> str:
         content = ''
@@ -60,43 +60,72 @@ class HtmlRequester(object):
                 pass
         return content
 
-    @retry(stop_max_attempt_number=3, wait_fixed=100)
-    def _request_html(self):
-        url = self.url
-        request_method = self.request_method
-        request_rod_url = self.request_rod_url
-        request_rod_duration = self.request_rod_duration
-
-        # print info
-        self.logger.info(f'Requesting {url} [method="{request_method}", duration={self.request_rod_duration}]')
-
-        if request_method == HTML_REQUEST_METHOD_ROD:
+    def _get_request_kwargs(self) -> dict:
+        if self.request_method == HTML_REQUEST_METHOD_ROD:
             # request rod (headless browser)
-            res = httpx.post(
-                request_rod_url,
-                json={'url': url, 'duration': request_rod_duration},
+            return dict(
+                method='POST',
+                url=self.request_rod_url,
+                json={'url': self.url, 'duration': self.request_rod_duration},
                 headers={'Content-Type': 'application/json'},
                 timeout=60,
             )
+        elif self.request_method == HTML_REQUEST_METHOD_REQUEST:
+            # plain request
+            return dict(
+                method='GET',
+                url=self.url,
+                timeout=Timeout(timeout=self.request_rod_duration),
+                follow_redirects=True,
+            )
+        else:
+            raise Exception(f'Invalid request method: {self.request_method}')
+
+    def _handle_response(self, res: Response):
+        if self.request_method == HTML_REQUEST_METHOD_ROD:
             if res.status_code != 200:
                 raise Exception(f'Invalid response from request rod: {res.status_code}')
             self.html_response = res
             self.html_ = json.loads(self._decode_response_content(res)).get('html')
-        elif request_method == HTML_REQUEST_METHOD_REQUEST:
-            # plain request
-            res = httpx.get(url, timeout=Timeout(timeout=self.request_rod_duration), follow_redirects=True)
+        else:
             if res.status_code != 200:
                 raise Exception(f'Invalid response from request: {res.status_code}')
             self.html_response = res
             self.html_ = self._decode_response_content(res)
-        else:
-            raise Exception(f'Invalid request method: {request_method}')
+
+    @retry(stop_max_attempt_number=3, wait_fixed=100)
+    def _request_html(self):
+        # print info
+        self.logger.info(f'Requesting {self.url} [method="{self.request_method}", '
+                         f'duration={self.request_rod_duration}]')
+
+        res = httpx.request(**self._get_request_kwargs())
+        self._handle_response(res)
+
+    async def _request_html_async(self):
+        # print info
+        self.logger.info(f'Requesting {self.url} [method="{self.request_method}", '
+                         f'duration={self.request_rod_duration}, async]')
+
+        # shared client (pooled connections, retries with backoff)
+        res = await self.http_client.request(**self._get_request_kwargs())
+        self._handle_response(res)
+
+    @property
+    def json_data(self) -> Optional[dict]:
+        if self.document is None:
+            return None
+        return self.document.json_data
 
     def _convert_to_json(self):
-        # convert html to json data
-        self.html_converter = HtmlConverter(self.html_)
-        self.json_data = self.html_converter.convert()
-        self.html_ = str(self.html_converter.soup)
+        # parse html once (json data is converted only when needed)
+        self.document = HtmlDocument(self.html_)
+        self.html_ = self.document.html
+
+    def load_document(self):
+        """Parse the html document if not parsed yet (e.g. after run(parse=False))."""
+        if self.document is None:
+            self._convert_to_json()
 
     def _save(self):
         # domain
@@ -133,7 +162,7 @@ class HtmlRequester(object):
         with open(self.html_path, 'r') as f:
             self.html_ = f.read()
 
-    def run(self):
+    def run(self, parse: bool = True):
         # request html page if url exists
         if self.html_:
             pass
@@ -144,10 +173,28 @@ class HtmlRequester(object):
         else:
             raise Exception('No url or html path provided')
 
+        self._post_run(parse)
+
+    async def run_async(self, parse: bool = True):
+        """Same as run, requesting the html page with the shared async http client."""
+        # request html page if url exists
+        if self.html_:
+            pass
+        elif self.html_path:
+            self._load_html()
+        elif self.url:
+            await self._request_html_async()
+        else:
+            raise Exception('No url or html path provided')
+
+        self._post_run(parse)
+
+    def _post_run(self, parse: bool):
         assert self.html_ is not None, 'No html obtained!'
 
-        # convert html to json data
-        self._convert_to_json()
+        # parse html document
+        if parse or self.save:
+            self._convert_to_json()
 
         # save
         if self.save:
@@ -155,4 +202,8 @@ class HtmlRequester(object):
 
     @property
     def html(self):
-        return transform_html_links(self.html_, self.url)
+        if self.document is None:
+            return transform_html_links(self.html_, self.url)
+        soup = self.document.copy_soup()
+        transform_soup_links(soup, self.url)
+        return str(soup)
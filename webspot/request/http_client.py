@@ -0,0 +1,139 @@
+import asyncio
+import os
+import random
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from webspot.logging import get_logger
+
+logger = get_logger('webspot.request.http_client')
+
+HTTP_MAX_CONNECTIONS = int(os.environ.get('WEBSPOT_HTTP_MAX_CONNECTIONS', 100))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('WEBSPOT_HTTP_MAX_CONNECTIONS_PER_HOST', 8))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('WEBSPOT_HTTP_KEEPALIVE_EXPIRY', 30))
+HTTP_HTTP2 = os.environ.get('WEBSPOT_HTTP_HTTP2', 'false').lower() == 'true'
+HTTP_MAX_ATTEMPTS = int(os.environ.get('WEBSPOT_HTTP_MAX_ATTEMPTS', 3))
+HTTP_BACKOFF_BASE = float(os.environ.get('WEBSPOT_HTTP_BACKOFF_BASE', 0.1))
+HTTP_BACKOFF_MAX = float(os.environ.get('WEBSPOT_HTTP_BACKOFF_MAX', 5))
+
+# statuses worth retrying (rate limited or temporarily unavailable)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def get_backoff_delay(attempt: int, base: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(max_delay, base * 2 ** attempt)]."""
+    return random.uniform(0, min(max_delay, base * 2 ** attempt))
+
+
+class AsyncHttpClient(object):
+    """
+    Shared, long-lived httpx.AsyncClient (connection pool with keep-alive, optionally HTTP/2),
+    with a limit of concurrent requests per host and retries with exponential backoff.
+
+    The underlying client and per-host semaphores are bound to the event loop they are created
+    in, so they are created again if used from another event loop (e.g. successive asyncio.run).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_connections_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP_HTTP2,
+        max_attempts: int = HTTP_MAX_ATTEMPTS,
+        backoff_base: float = HTTP_BACKOFF_BASE,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+        **client_kwargs,
+    ):
+        # settings
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client_kwargs = client_kwargs
+
+        # internals
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning('h2 is not installed (pip install webspot[http2]), falling back to HTTP/1.1')
+                http2 = False
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            http2=http2,
+            follow_redirects=True,
+            **self.client_kwargs,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = self._create_client()
+            self._loop = loop
+            self._host_semaphores = {}
+        return self._client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transport errors and retryable statuses (e.g. 429, 503)
+        up to max attempts. The response of the last attempt is returned as is.
+        """
+        client = self.client
+        semaphore = self._get_host_semaphore(url)
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    res = await client.request(method, url, **kwargs)
+                if res.status_code not in RETRY_STATUS_CODES or attempt + 1 >= self.max_attempts:
+                    return res
+                logger.debug(f'retrying {method} {url}: status {res.status_code}')
+            except httpx.TransportError as e:
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                logger.debug(f'retrying {method} {url}: {e!r}')
+            await asyncio.sleep(get_backoff_delay(attempt, self.backoff_base, self.backoff_max))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        self._host_semaphores = {}
+
+
+# http client shared by async html requesters of the process
+http_client = AsyncHttpClient()
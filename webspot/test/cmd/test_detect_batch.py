@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+from webspot.cmd.detect_batch import iterate_pages, get_completed_ids, run_batch
+from webspot.extract.worker_pool import WorkerPool
+
+
+def _job(url, html, detectors=None, detector_kwargs=None):
+    if 'error' in html:
+        raise ValueError('invalid html')
+    return {'length': len(html)}, {'graph_loader': 1}
+
+
+def test_iterate_pages(tmp_path):
+    html_dir = tmp_path / 'example.com' / 'html'
+    html_dir.mkdir(parents=True)
+    (html_dir / 'a.html').write_text('<html>a</html>')
+    (html_dir / 'b.html').write_text('<html>b</html>')
+
+    # directory (url inferred from the data layout)
+    pages = list(iterate_pages(str(tmp_path)))
+    assert [p['html'] for p in pages] == ['<html>a</html>', '<html>b</html>']
+    assert pages[0]['url'] == 'https://example.com/'
+
+    # glob
+    assert len(list(iterate_pages(str(tmp_path / '**' / 'a.html')))) == 1
+
+    # jsonl
+    jsonl_path = tmp_path / 'pages.jsonl'
+    jsonl_path.write_text('\n'.join(json.dumps({'url': f'https://example.com/{i}', 'html': 'x'}) for i in range(3)))
+    assert [p['id'] for p in iterate_pages(str(jsonl_path))] == [f'https://example.com/{i}' for i in range(3)]
+
+    # jsonl with a repeated url (id is the line number)
+    jsonl_path.write_text('\n'.join(json.dumps({'url': 'https://example.com', 'html': 'x'}) for _ in range(3)))
+    assert [p['id'] for p in iterate_pages(str(jsonl_path))] == ['https://example.com', '1', '2']
+
+    # jsonl with a duplicate id
+    jsonl_path.write_text('\n'.join(json.dumps({'id': 'a', 'html': 'x'}) for _ in range(2)))
+    with pytest.raises(Exception, match='Duplicate id a'):
+        list(iterate_pages(str(jsonl_path)))
+
+    # jsonl without html (fetched by url only if required)
+    jsonl_path.write_text(json.dumps({'url': 'https://example.com'}))
+    with pytest.raises(Exception, match='Missing html'):
+        list(iterate_pages(str(jsonl_path)))
+    pages = list(iterate_pages(str(jsonl_path), fetch=True))
+    assert pages == [{'id': 'https://example.com', 'url': 'https://example.com', 'html': None}]
+
+
+def test_run_batch(tmp_path):
+    pages = [{'id': str(i), 'url': None, 'html': 'error' if i == 2 else 'x' * i} for i in range(5)]
+    worker_pool = WorkerPool(max_workers=2, job_fn=_job)
+    output = io.StringIO()
+    stats = run_batch(iter(pages), output, worker_pool, skip_ids={'0'})
+    worker_pool.shutdown()
+    assert stats == {'done': 3, 'failed': 1, 'skipped': 1}
+
+    records = {r['id']: r for r in map(json.loads, output.getvalue().splitlines())}
+    assert sorted(records.keys()) == ['1', '2', '3', '4']
+    assert records['3']['results'] == {'length': 3}
+    assert records['3']['execution_time']['total'] >= 0
+    assert records['2']['error'] == 'ValueError: invalid html'
+
+    # failed pages and a truncated last line are not completed
+    output_path = tmp_path / 'results.jsonl'
+    output_path.write_text(output.getvalue() + '{"id": "5", "res')
+    assert get_completed_ids(str(output_path)) == {'1', '3', '4'}
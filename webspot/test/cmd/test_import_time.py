@@ -0,0 +1,57 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+import pytest
+
+from webspot.logging import get_logger
+
+logger = get_logger('webspot.test.cmd.test_import_time')
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+# modules imported at cold start of each subcommand (or entry point)
+SUBCOMMAND_MODULES = {
+    'crawl': 'webspot.cmd.crawl',
+    'web': 'webspot.cmd.web',
+    'request': 'webspot.cmd.request',
+    'detect-batch': 'webspot.cmd.detect_batch',
+    'extract': 'webspot.extract.extract_results',
+}
+
+# heavy modules that should only be imported on first use (by detectors, embed backends, web server)
+HEAVY_MODULES = ['sklearn', 'pandas', 'scipy.stats', 'torch', 'dgl', 'networkx', 'autopager', 'parsel', 'uvicorn']
+
+
+def get_import_time(module: str) -> Tuple[float, List[str]]:
+    """Import time (seconds) of a module in a fresh interpreter, and modules imported with it."""
+    code = '\n'.join([
+        'import json, sys, time',
+        'tic = time.perf_counter()',
+        f'import {module}',
+        'toc = time.perf_counter()',
+        'print(json.dumps({"time": toc - tic, "modules": sorted(sys.modules)}))',
+    ])
+    res = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    data = json.loads(res.stdout.strip().splitlines()[-1])
+    return data['time'], data['modules']
+
+
+@pytest.mark.parametrize('subcommand', list(SUBCOMMAND_MODULES.keys()))
+def test_import_time(subcommand):
+    import_time, modules = get_import_time(SUBCOMMAND_MODULES[subcommand])
+    logger.info(f'{subcommand}: {import_time * 1000:.0f}ms')
+
+    heavy_modules = [m for m in HEAVY_MODULES if m in modules]
+    assert heavy_modules == [], f'heavy modules imported at startup of {subcommand}: {heavy_modules}'
+
+
+if __name__ == '__main__':
+    # benchmark: median cold-start import time of each subcommand
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for subcommand, module in SUBCOMMAND_MODULES.items():
+        times = [get_import_time(module)[0] for _ in range(runs)]
+        print(f'{subcommand:<14} {statistics.median(times) * 1000:8.0f}ms')
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from webspot.constants.clustering_backend import CLUSTERING_BACKEND_GRID
+from webspot.detect.utils.clustering import NodeClustering, collapse_duplicate_rows, get_canonical_labels
+
+
+def test_collapse_duplicate_rows():
+    x = np.array([[1., 0.], [0., 1.], [1., 0.], [1., 0.]])
+    unique_x, inverse_vec, counts_vec = collapse_duplicate_rows(x)
+    assert np.array_equal(unique_x[inverse_vec], x)
+    assert sorted(counts_vec.tolist()) == [1, 3]
+
+
+def test_get_canonical_labels():
+    labels_vec = np.array([3, -1, 0, 3, 0, 5])
+    assert get_canonical_labels(labels_vec).tolist() == [0, -1, 1, 0, 1, 2]
+
+    # numbered by first core sample
+    core_mask_vec = np.array([False, False, True, True, True, True])
+    assert get_canonical_labels(labels_vec, core_mask_vec).tolist() == [1, -1, 0, 1, 0, 2]
+
+
+def test_node_clustering_dbscan():
+    from sklearn.cluster import DBSCAN
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(5, 8))
+    x = centers[rng.integers(0, 5, 300)]
+    x[:20] += rng.normal(scale=0.003, size=(20, 8))
+
+    clustering = NodeClustering(eps=0.01, min_samples=5).fit(x)
+    assert clustering.n_unique_samples < clustering.n_samples
+
+    # same labels as dbscan on all rows
+    labels_vec = DBSCAN(eps=0.01, min_samples=5).fit(csr_matrix(x)).labels_
+    assert np.array_equal(clustering.labels_, labels_vec)
+
+
+def test_node_clustering_grid():
+    x = np.repeat(np.array([[0., 0.], [1., 1.], [2., 2.]]), [6, 6, 2], axis=0)
+    clustering = NodeClustering(backend=CLUSTERING_BACKEND_GRID, eps=0.01, min_samples=5).fit(x)
+    assert clustering.labels_.tolist() == [0] * 6 + [1] * 6 + [-1] * 2
+
+
+def test_node_clustering_invalid_backend():
+    with pytest.raises(Exception):
+        NodeClustering(backend='kmeans')
+
+    # backend changed after init
+    clustering = NodeClustering()
+    clustering.backend = 'kmeans'
+    with pytest.raises(Exception, match='Invalid clustering backend'):
+        clustering.fit(np.zeros((6, 2)))
@@ -0,0 +1,21 @@
+import numpy as np
+
+from webspot.detect.utils.math import group_by_label_parent
+
+
+def test_group_by_label_parent():
+    # label 0: parents 10 (x3) and 11 (x1), label 1: parent 20 (x3), label 2: parents 30 and 31 (x2 each)
+    labels_vec = np.array([0, 1, 0, -1, 1, 0, 2, 1, 0, 2, 2, 2, -1])
+    parent_ids_vec = np.array([10, 20, 10, 10, 20, 11, 30, 20, 10, 31, 30, 31, 20])
+
+    groups = group_by_label_parent(labels_vec, parent_ids_vec)
+
+    # labels by entropy of parents (1, then 0, then 2), then parents by first appearance; noise skipped
+    assert [g.tolist() for g in groups] == [[1, 4, 7], [0, 2, 8], [5], [6, 10], [9, 11]]
+
+    # groups smaller than min group size are skipped
+    groups = group_by_label_parent(labels_vec, parent_ids_vec, min_group_size=3)
+    assert [g.tolist() for g in groups] == [[1, 4, 7], [0, 2, 8]]
+
+    # noise only
+    assert group_by_label_parent(np.array([-1, -1]), np.array([0, 0])) == []
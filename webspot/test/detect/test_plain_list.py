@@ -1,6 +1,8 @@
 import pytest
 
-from webspot.detect.detectors.plain_list import run_plain_list_detector
+from webspot.detect.detectors.plain_list import PlainListDetector, run_plain_list_detector
+from webspot.graph.graph_loader import GraphLoader
+from webspot.request.html_document import HtmlDocument
 from webspot.logging import get_logger
 
 logger = get_logger('webspot.test.detect.test_plain_list')
@@ -113,3 +115,56 @@ def test_plain_list(test_case):
     assert test_case_list_selector in target_result.selectors.get('list').selector, 'selectors should be matched'
     assert len(target_result.fields) > 0, 'target fields should be more than 0'
     assert len(target_result.data) > 0, 'target data should be more than 0'
+
+
+def test_extract_fields():
+    # links in all items, images in 2 of 5 items, descriptions in 4 of 5 items
+    items = ''.join(
+        f'<li class="item"><a class="title" href="/p/{i}">Title {i}</a>'
+        f'{"<img src=/i.png>" if i < 2 else ""}'
+        f'{"<p>Description</p>" if i > 0 else ""}</li>'
+        for i in range(5)
+    )
+    document = HtmlDocument(f'<html><body><ul class="list">{items}<p>Other</p></ul></body></html>')
+    graph_loader = GraphLoader(document.html, document=document)
+    graph_loader.load_structure()
+    detector = PlainListDetector(html_requester=None, graph_loader=graph_loader)
+    list_node = [n for n in graph_loader.nodes_ if n.tag == 'ul'][0]
+    item_nodes = [n for n in graph_loader.get_node_children_by_id(list_node.id) if n.tag == 'li']
+
+    fields = detector._extract_fields_by_id(list_node.id, item_nodes)
+    assert [(f.name, f.selector, f.type) for f in fields] == [
+        ('Field_text_1', 'li.item > a.title', 'text'),
+        ('Field_link_url_2', 'li.item > a.title', 'link_url'),
+        ('Field_text_4', 'li.item > p', 'text'),
+    ]
+
+    # deterministic
+    assert detector._extract_fields_by_id(list_node.id, item_nodes) == fields
+
+
+def test_deprecated_sample_item_nodes():
+    with pytest.warns(DeprecationWarning, match='sample_item_nodes'):
+        PlainListDetector(html_requester=None, graph_loader=None, sample_item_nodes=10)
+
+
+def test_filter_empty_candidates():
+    items = ''.join(f'<li class="item"><a href="/p/{i}">Title {i}</a><p>Description {i}</p></li>' for i in range(5))
+    document = HtmlDocument(f'<html><body><ul class="list">{items}</ul><div></div></body></html>')
+    graph_loader = GraphLoader(document.html, document=document)
+    graph_loader.load_structure()
+    detector = PlainListDetector(html_requester=None, graph_loader=graph_loader)
+    list_node = [n for n in graph_loader.nodes_ if n.tag == 'ul'][0]
+    empty_node = [n for n in graph_loader.nodes_ if n.tag == 'div'][0]
+    item_nodes = [n for n in graph_loader.get_node_children_by_id(list_node.id) if n.tag == 'li']
+
+    # candidates without items are scored zero (and filtered out), not with the items of the next one
+    _, _, score_list, scores_list = detector._filter([list_node], [item_nodes])
+    for candidates in [[list_node, empty_node], [empty_node, list_node], [empty_node, list_node, empty_node]]:
+        res = detector._filter(candidates, [item_nodes if n is list_node else [] for n in candidates])
+        assert res[0] == [list_node]
+        assert res[2] == score_list
+        assert res[3] == scores_list
+
+    with pytest.raises(Exception, match='Invalid score_sample_item_nodes'):
+        PlainListDetector(html_requester=None, graph_loader=None, score_sample_item_nodes=0)
@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from webspot.detect.detectors.plain_list import PlainListDetector
+from webspot.detect.utils.math import sparse_pca
+from webspot.detect.utils.projection_cache import ProjectionCache, get_explained_variance_ratio
+from webspot.graph.graph_loader import GraphLoader
+from webspot.request.html_requester import HtmlRequester
+
+KEY = ('example.com', 'template')
+
+
+def _get_page(columns, seed: int, n_rows: int = 200, n_patterns: int = 8):
+    rng = np.random.default_rng(seed)
+    patterns = (rng.random((n_patterns, len(columns))) < 0.1).astype(float)
+    x = patterns[rng.integers(0, n_patterns, n_rows)]
+    return csr_matrix(x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12))
+
+
+def test_projection_cache():
+    cache = ProjectionCache(size=2)
+    columns = [f'class=c{i}' for i in range(100)]
+    x = _get_page(columns, seed=0, n_rows=2000)
+
+    # fit on first page (on all rows, same projection as without the cache)
+    projected_x = cache.transform(KEY, x, columns, n_components=10)
+    assert projected_x.shape == (2000, 10)
+    assert np.allclose(projected_x, sparse_pca(x, n_components=10))
+    assert get_explained_variance_ratio(x, projected_x) > 0.99
+    assert cache.stats.misses == 1
+
+    # same site, with columns in another order (e.g. new features sorted in between)
+    order = np.random.default_rng(1).permutation(len(columns))
+    projected_x2 = cache.transform(KEY, x[:, order], [columns[i] for i in order], n_components=10)
+    assert cache.stats.hits == 1
+    assert np.allclose(projected_x2, projected_x)
+
+    # the basis fitted with sparse_pca can be updated
+    cache.min_update_drift = -1
+    cache.transform(KEY, _get_page(columns, seed=0, n_rows=300), columns, n_components=10)
+    assert cache.updates == 1
+    assert cache.stats.hits == 2
+
+    # pages of the site with other features drift, and are refitted
+    other_columns = [f'class=d{i}' for i in range(100)]
+    cache.transform(KEY, _get_page(other_columns, seed=2), other_columns, n_components=10)
+    assert cache.refits == 1
+    assert cache.stats.misses == 2
+
+    # lru
+    cache.transform(('a.com', 'template'), x, columns, n_components=10)
+    cache.transform(('b.com', 'template'), x, columns, n_components=10)
+    assert len(cache) == 2
+
+
+def _get_list_page(seed: int, n_items: int = 200) -> str:
+    rnd = random.Random(seed)
+    items = ''.join(
+        f'<li class="item"><a class="title" href="/p/{i}">Title {i}</a>'
+        f'<span class="date">Date {i}</span><p>Description {i}</p></li>'
+        for i in range(n_items)
+    )
+    # navigation and tags links, with more (shared) classes than pca components
+    nav = ''.join(f'<li><a class="nav n{i % 40}" href="/n/{i}">Nav {i}</a></li>' for i in range(80))
+    tags = ''.join(f'<li><a class="tag t{rnd.randrange(60)}" href="/t/{i}">Tag {i}</a></li>' for i in range(120))
+    return f'<html><body><header><ul class="nav">{nav}</ul></header><ul class="list">{items}</ul>' \
+           f'<aside><ul class="tags">{tags}</ul></aside></body></html>'
+
+
+def _get_detector(html: str, projection_cache: ProjectionCache = None) -> PlainListDetector:
+    html_requester = HtmlRequester(url='https://example.com/list', html=html)
+    html_requester.run()
+    graph_loader = GraphLoader(html_requester.html_, document=html_requester.document, random_seed=0)
+    graph_loader.run()
+    return PlainListDetector(html_requester=html_requester, graph_loader=graph_loader,
+                             projection_cache=projection_cache)
+
+
+def _detect(html: str, projection_cache: ProjectionCache = None):
+    detector = _get_detector(html, projection_cache)
+    detector.run()
+    return [r.dict() for r in detector.results]
+
+
+def test_projection_cache_detector_results():
+    # page with more nodes than any sample, and more features than pca components
+    html = _get_list_page(seed=0)
+    x = _get_detector(html)._get_nodes_features()
+    results = _detect(html)
+    assert x.shape[0] > 1000
+    assert len(results) > 0
+
+    # same features and results with the cache when fitting a new basis
+    cache = ProjectionCache(size=1)
+    assert np.allclose(_get_detector(html, cache)._get_nodes_features(), x)
+    assert cache.stats.misses == 1
+    assert _detect(html, ProjectionCache(size=1)) == results
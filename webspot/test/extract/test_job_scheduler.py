@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from webspot.extract.job_scheduler import JobScheduler, JobQueueFullError
+
+html = '<html><body><p>Hello</p></body></html>'
+
+
+def _job(url, html, detectors, detector_kwargs):
+    time.sleep(0.05)
+    return {'detectors': detectors, 'length': len(html)}, {'html_requester': 1}
+
+
+def test_job_scheduler():
+    async def run():
+        scheduler = JobScheduler(max_workers=2, max_fetches=1, max_queue_size=3, job_fn=_job)
+        statuses = []
+
+        async def on_running():
+            statuses.append('running')
+
+        jobs = [scheduler.submit(html=html, detectors=['plain_list'], on_running=on_running) for _ in range(3)]
+        assert scheduler.queued == 3
+
+        # queue is full
+        with pytest.raises(JobQueueFullError):
+            scheduler.submit(html=html)
+        assert scheduler.rejected == 1
+
+        res = await asyncio.gather(*jobs)
+        scheduler.shutdown()
+        return scheduler, statuses, res
+
+    scheduler, statuses, res = asyncio.run(run())
+    assert len(statuses) == 3
+    for results, execution_time, html_requester in res:
+        assert results == {'detectors': ['plain_list'], 'length': len(html)}
+        assert execution_time['queue'] >= 0
+        assert html_requester.html_ == html
+    assert scheduler.dict()['done'] == 3
+    assert scheduler.queued == 0
+    assert scheduler.running == 0
+    assert not scheduler.full
@@ -0,0 +1,66 @@
+import os
+import time
+
+from webspot.extract.result_cache import ResultCache, get_result_cache_key
+
+html = '<html><body>\n<ul><li>1</li><li>2</li></ul>\n</body></html>'
+
+
+def test_result_cache_key():
+    key = get_result_cache_key(html, 'https://example.com', ['plain_list'])
+
+    # node ids, line endings and trailing whitespaces are ignored
+    html_ = html.replace('<ul>', '<ul node-id="2">').replace('\n', '  \r\n')
+    assert get_result_cache_key(html_, 'https://example.com', ['plain_list']) == key
+
+    # url, detectors and detector kwargs are part of the key
+    assert get_result_cache_key(html, 'https://example.org', ['plain_list']) != key
+    assert get_result_cache_key(html, 'https://example.com', ['pagination']) != key
+    assert get_result_cache_key(html, 'https://example.com', ['plain_list'],
+                                {'plain_list': {'score_threshold': 2.}}) != key
+
+
+def test_memory():
+    cache = ResultCache(size=2, cache_dir=None)
+    cache.set('a', {'results': 1})
+    cache.set('b', {'results': 2})
+    assert cache.get('a') == {'results': 1}
+
+    # least recently used entry is evicted
+    cache.set('c', {'results': 3})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'results': 1}
+    assert cache.get('c') == {'results': 3}
+    assert cache.memory_stats.hits == 3
+    assert cache.memory_stats.misses == 1
+
+    # values are copies
+    cache.get('a')['results'] = 0
+    assert cache.get('a') == {'results': 1}
+
+
+def test_disk(tmp_path):
+    value = {'results': 'x' * 100}
+    cache = ResultCache(size=0, cache_dir=str(tmp_path), cache_dir_max_size=250)
+    cache.set('aa1', value)
+    time.sleep(0.01)
+    cache.set('aa2', value)
+    time.sleep(0.01)
+
+    # hit refreshes the entry
+    assert cache.get('aa1') == value
+    time.sleep(0.01)
+
+    # least recently used files are evicted beyond max size
+    cache.set('bb3', value)
+    assert not os.path.exists(os.path.join(tmp_path, 'aa', 'aa2.json'))
+    assert cache.get('aa1') == value
+    assert cache.get('bb3') == value
+    assert cache.get('aa2') is None
+    assert cache.dict()['disk']['size'] <= 250
+
+    # shared between cache instances
+    assert ResultCache(size=0, cache_dir=str(tmp_path)).get('bb3') == value
+
+    cache.clear()
+    assert cache.get('bb3') is None
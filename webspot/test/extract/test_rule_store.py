@@ -0,0 +1,112 @@
+from webspot.detect.detectors.plain_list import PlainListDetector
+from webspot.extract.rule_store import RuleStore
+from webspot.graph.graph_loader import GraphLoader
+from webspot.request.html_document import HtmlDocument
+
+
+def _get_html(items_count: int) -> str:
+    items = ''.join(f'<li class="item"><a href="/p/{i}">Title {i}</a><span class="date">Date {i}</span></li>'
+                    for i in range(items_count))
+    return f'<html><body><div id="nav"><a href="/">Home</a></div><ul class="list">{items}</ul></body></html>'
+
+
+def _get_graph_loader(html: str) -> GraphLoader:
+    document = HtmlDocument(html)
+    graph_loader = GraphLoader(document.html, document=document)
+    graph_loader.load_structure()
+    return graph_loader
+
+
+def test_rule_store():
+    rule_store = RuleStore(size=2)
+    rule_store.set(('example.com', 'a'), 'plain_list', [{'name': 'List 1'}])
+    rule_store.set(('example.com', 'a'), 'pagination', [{'name': 'Next'}])
+    assert rule_store.get(('example.com', 'a')) == {
+        'plain_list': [{'name': 'List 1'}],
+        'pagination': [{'name': 'Next'}],
+    }
+
+    # least recently used key is evicted
+    rule_store.set(('example.com', 'b'), 'plain_list', [])
+    rule_store.get(('example.com', 'a'))
+    rule_store.set(('example.com', 'c'), 'plain_list', [])
+    assert rule_store.get(('example.com', 'b')) == {}
+    assert len(rule_store) == 2
+    assert rule_store.stats.hits == 2
+    assert rule_store.stats.misses == 1
+
+
+def test_revalidate():
+    results = [{
+        'name': 'List 1',
+        'selectors': {
+            'list': {'name': 'list', 'selector': 'body > ul.list', 'type': 'css'},
+            'items': {'name': 'items', 'selector': 'li.item', 'type': 'css'},
+            'full_items': {'name': 'items', 'selector': 'body > ul.list > li.item', 'type': 'css'},
+        },
+        'fields': [
+            {'name': 'Field_text_1', 'selector': 'a', 'type': 'text', 'attribute': ''},
+            {'name': 'Field_text_2', 'selector': 'span.date', 'type': 'text', 'attribute': ''},
+        ],
+        'data': [],
+        'score': 1.,
+        'detector': 'plain_list',
+    }]
+
+    # rules are applied on a page of the same template
+    graph_loader = _get_graph_loader(_get_html(8))
+    detector = PlainListDetector(graph_loader=graph_loader, html_requester=None)
+    assert detector.revalidate(results)
+    assert len(detector.results[0].data) == 8
+    assert detector.results[0].data[7] == {'Field_text_1': 'Title 7', 'Field_text_2': 'Date 7'}
+    assert detector.results[0].selectors['list'].node_id == [n.id for n in graph_loader.nodes_ if n.tag == 'ul'][0]
+
+    # too few items
+    detector = PlainListDetector(graph_loader=_get_graph_loader(_get_html(3)), html_requester=None)
+    assert not detector.revalidate(results)
+    assert detector.results == []
+
+
+def test_extract_rules_rule_store():
+    from webspot.extract.extract_results import extract_rules
+
+    rule_store = RuleStore(size=8)
+
+    # pages without url are not stored (unknown site)
+    extract_rules(html=_get_html(20), detectors=['plain_list'], result_cache=None, rule_store=rule_store)
+    assert len(rule_store) == 0
+
+    # pages with url are stored by site and template
+    results, _, _, _, _ = extract_rules(url='https://example.com/a', html=_get_html(20), detectors=['plain_list'],
+                                        result_cache=None, rule_store=rule_store)
+    assert len(results['plain_list']) > 0
+    assert len(rule_store) == 1
+
+
+def test_revalidate_pagination():
+    from webspot.detect.detectors.pagination import PaginationDetector
+    from webspot.request.html_requester import HtmlRequester
+
+    results = [{
+        'name': 'Next',
+        'selectors': {
+            'next': {'name': 'pagination', 'selector': 'body > div.pages > a', 'type': 'css'},
+        },
+        'score': 1.,
+        'detector': 'pagination',
+    }]
+
+    def _get_detector(page: int, link: str) -> PaginationDetector:
+        html = f'<html><body><div class="pages">{link}</div></body></html>'
+        html_requester = HtmlRequester(url=f'https://example.com/list?page={page}', html=html)
+        return PaginationDetector(graph_loader=_get_graph_loader(html), html_requester=html_requester)
+
+    # next link at the same position
+    detector = _get_detector(2, '<a href="/list?page=3">Next</a>')
+    assert detector.revalidate(results)
+    assert detector.next_url == '/list?page=3'
+
+    # link at the same position is not the next link (last page)
+    detector = _get_detector(3, '<a href="/list?page=2">Previous</a>')
+    assert not detector.revalidate(results)
+    assert detector.results == []
@@ -0,0 +1,30 @@
+import os
+
+from webspot.extract.worker_pool import WorkerPool, encode_payload, decode_payload
+
+
+def _job(url, html, detectors=None, detector_kwargs=None):
+    return {'url': url, 'length': len(html)}, {'pid': os.getpid()}
+
+
+def test_payload():
+    data = {'url': 'https://example.com', 'html': '<li class="item">Item</li>' * 100}
+    payload = encode_payload(data)
+    assert decode_payload(payload) == data
+    assert len(payload) < len(data['html']) / 10
+
+
+def test_worker_pool():
+    worker_pool = WorkerPool(max_workers=2, job_fn=_job)
+    futures = [worker_pool.submit(url=f'https://example.com/{i}', html='x' * i) for i in range(4)]
+    res = [f.result(timeout=60) for f in futures]
+    workers_cache_stats = worker_pool.workers_cache_stats
+    worker_pool.shutdown()
+
+    assert [r[0] for r in res] == [{'url': f'https://example.com/{i}', 'length': i} for i in range(4)]
+    assert all(r[1]['pid'] != os.getpid() for r in res)
+
+    # cache stats of each worker
+    assert set(workers_cache_stats.keys()) == {r[1]['pid'] for r in res}
+    assert all(stats['rule_store']['size'] == 0 for stats in workers_cache_stats.values())
+    assert worker_pool.workers_cache_stats == {}
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from webspot.graph.graph_loader import GraphLoader
+from webspot.request.html_document import HtmlDocument
+
+html = '''<!DOCTYPE html>
+<html>
+<head><title>Test</title></head>
+<body>
+    <ul class="list">
+        <li class="item">Item 1</li>
+        <li class="item">Item 2</li>
+        <li class="item special">Item 3</li>
+        <svg><path d="M0 0"></path></svg>
+        <li class="item">Item 4</li>
+    </ul>
+    <div><p>Text</p><p>More text</p></div>
+</body>
+</html>'''
+
+
+@pytest.fixture
+def graph_loader() -> GraphLoader:
+    document = HtmlDocument(html)
+    graph_loader = GraphLoader(document.html, document=document)
+    graph_loader.run()
+    return graph_loader
+
+
+def _get_nodes_by_tag(graph_loader: GraphLoader, tag: str):
+    return [n for n in graph_loader.nodes_ if n.tag == tag]
+
+
+def test_node_children(graph_loader):
+    list_node = _get_nodes_by_tag(graph_loader, 'ul')[0]
+    children = graph_loader.get_node_children_by_id(list_node.id)
+    assert [n.tag for n in children] == ['li', 'li', 'li', 'li']
+
+
+def test_node_siblings(graph_loader):
+    item_nodes = _get_nodes_by_tag(graph_loader, 'li')
+    assert len(graph_loader._get_node_previous_siblings(item_nodes[3])) == 3
+    assert len(graph_loader._get_node_previous_siblings_with_classes(item_nodes[2])) == 0
+    assert graph_loader._is_node_last_child(item_nodes[3])
+    assert not graph_loader._is_node_last_child(item_nodes[0])
+
+
+def test_node_css_selector_path(graph_loader):
+    item_nodes = _get_nodes_by_tag(graph_loader, 'li')
+    p_nodes = _get_nodes_by_tag(graph_loader, 'p')
+    assert graph_loader.get_node_css_selector_path(item_nodes[1]).endswith('ul.list > li.item:nth-of-type(2)')
+    assert graph_loader.get_node_css_selector_path(item_nodes[3]).endswith('ul.list > li.item:last-child')
+    assert graph_loader.get_node_css_selector_path(p_nodes[1]).endswith('div > p:last-child')
+    assert graph_loader.get_node_css_selector_path(item_nodes[0], numbered=False) == 'ul.list > li.item'
+
+
+def test_random_seed():
+    document = HtmlDocument(html)
+    walks = []
+    for _ in range(2):
+        graph_loader = GraphLoader(document.html, document=document, random_seed=42)
+        graph_loader.run()
+        walks.append(graph_loader.nodes_walks_vec)
+    assert (walks[0] == walks[1]).all()
+
+
+def test_node_children_recursive(graph_loader):
+    body_node = _get_nodes_by_tag(graph_loader, 'body')[0]
+    children = graph_loader.get_node_children_recursive_by_id(body_node.id)
+    # children first, then grandchildren grouped by parent (svg and its children are escaped)
+    assert [n.tag for n in children] == ['ul', 'div', 'li', 'li', 'li', 'li', 'p', 'p']
+
+    # depth limit
+    graph_loader.dfs_depth = 1
+    children = graph_loader.get_node_children_recursive_by_id(body_node.id)
+    assert [n.tag for n in children] == ['ul', 'div']
+
+
+def test_node_id_to_idx(graph_loader):
+    ids = graph_loader.nodes_ids_vec
+    assert (graph_loader.nodes_id_to_idx_vec[ids] == list(range(len(graph_loader.nodes_)))).all()
+
+    # escaped nodes (svg) are not mapped
+    escaped_ids = set(range(len(graph_loader.nodes_id_to_idx_vec))) - set(ids.tolist())
+    assert len(escaped_ids) > 0
+    assert (graph_loader.nodes_id_to_idx_vec[list(escaped_ids)] == -1).all()
+
+
+def test_template_fingerprint(graph_loader):
+    # same template with other items
+    other_html = html.replace('<li class="item">Item 4</li>', '').replace('Item 1', 'Item 5')
+    document = HtmlDocument(other_html)
+    other_graph_loader = GraphLoader(document.html, document=document)
+    other_graph_loader.load_structure()
+    assert other_graph_loader.template_fingerprint == graph_loader.template_fingerprint
+
+    # other template
+    other_html = html.replace('<ul class="list">', '<ul class="grid">')
+    document = HtmlDocument(other_html)
+    other_graph_loader = GraphLoader(document.html, document=document)
+    other_graph_loader.load_structure()
+    assert other_graph_loader.template_fingerprint != graph_loader.template_fingerprint
+
+
+def test_nodes_descendants_text_stats(graph_loader):
+    nodes_idx = np.arange(len(graph_loader.nodes_))
+
+    # same as descendants within depth limit
+    for graph_loader.dfs_depth in [8, 1]:
+        text_length_vec, text_count_vec, has_descendants_vec = \
+            graph_loader.get_nodes_descendants_text_stats(nodes_idx)
+        for idx in nodes_idx:
+            lengths = graph_loader.nodes_text_length_vec[graph_loader.get_node_children_idx_recursive_by_idx(idx)]
+            assert text_length_vec[idx] == lengths.sum()
+            assert text_count_vec[idx] == (lengths > 0).sum()
+            assert has_descendants_vec[idx] == (len(lengths) > 0)
+
+    list_idx = graph_loader.nodes_id_to_idx_vec[_get_nodes_by_tag(graph_loader, 'ul')[0].id]
+    assert text_count_vec[list_idx] == 4
+
+
+def test_nodes_descendants_text_stats_escaped_parent():
+    # title within an svg (escaped) has its own root and is not a descendant of the item
+    document = HtmlDocument('<html><body><ul>' +
+                            '<li><svg><title>very long svg title text here</title></svg><p>hi</p></li>' * 2 +
+                            '<li><svg><title>icon only</title></svg></li></ul></body></html>')
+    graph_loader = GraphLoader(document.html, document=document)
+    graph_loader.load_structure()
+    nodes_idx = np.arange(len(graph_loader.nodes_))
+
+    text_length_vec, text_count_vec, has_descendants_vec = graph_loader.get_nodes_descendants_text_stats(nodes_idx)
+    for idx in nodes_idx:
+        lengths = graph_loader.nodes_text_length_vec[graph_loader.get_node_children_idx_recursive_by_idx(idx)]
+        assert text_length_vec[idx] == lengths.sum()
+        assert text_count_vec[idx] == (lengths > 0).sum()
+        assert has_descendants_vec[idx] == (len(lengths) > 0)
+
+    items_idx = graph_loader.nodes_id_to_idx_vec[[n.id for n in _get_nodes_by_tag(graph_loader, 'li')]]
+    assert text_length_vec[items_idx].tolist() == [2, 2, 0]
+    assert has_descendants_vec[items_idx].tolist() == [True, True, False]
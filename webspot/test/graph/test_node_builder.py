@@ -0,0 +1,43 @@
+from bs4 import BeautifulSoup
+from html_to_json_enhanced.convert_html import convert
+
+from webspot.graph.graph_loader import GraphLoader
+from webspot.graph.node_builder import get_root_tag, assign_node_ids
+from webspot.request.html_document import HtmlDocument
+
+html = '''<!DOCTYPE html>
+<html>
+<head><script>var a = "<div>";</script></head>
+<body>
+    <div id="main" class="list container">
+        Text <!-- comment --> more
+        <a href="/1" class="item">Item 1</a>
+        <svg><g><title>Icon</title><path d="M0 0"></path></g></svg>
+        <a href="/2" class="item">Item <b>2</b></a>
+    </div>
+    <script type="application/json">{"a": 1}</script>
+</body>
+</html>'''
+
+
+def _get_rows(graph_loader: GraphLoader):
+    return [(n.id, n.parent_id, n.features, n.text) for n in graph_loader.nodes_]
+
+
+def test_assign_node_ids():
+    soup = BeautifulSoup(html, 'html.parser')
+    assert assign_node_ids(get_root_tag(soup)) == 13
+    assert soup.select_one('body').attrs.get('node-id') == 3
+
+
+def test_node_builder():
+    # node records read from the parsed document are the same as from the json data
+    document = HtmlDocument(html)
+    graph_loader = GraphLoader(document.html, document=document)
+    graph_loader.load_graph_data()
+    graph_loader_json = GraphLoader(html, json_data=convert(html, with_id=True))
+    graph_loader_json.load_graph_data()
+    assert _get_rows(graph_loader) == _get_rows(graph_loader_json)
+
+    # escaped tags are skipped (title within svg is kept)
+    assert [n.tag for n in graph_loader.nodes_] == ['body', 'div', 'a', 'title', 'a', 'b']
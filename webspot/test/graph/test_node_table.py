@@ -0,0 +1,45 @@
+from webspot.graph.models.node_table import NodeTable
+
+
+def test_node_table():
+    table = NodeTable()
+    table.append(0, None, [('tag', 'ul'), ('id', 'list'), ('class', 'list')])
+    table.append(1, 0, [('tag', 'li'), ('class', 'item'), ('class', '1st'), ('class', 'hover:red')], 'Item 1')
+    table.append(2, 0, [('tag', 'li'), ('class', 'item'), ('class', '1st'), ('href', '/2')], 'Item 2')
+    # parent (id 3) is not a node, e.g. escaped
+    table.append(4, 3, [('tag', 'span')])
+    table.build()
+
+    ul, li1, li2, span = table.nodes
+    assert ul.id == 0 and ul.parent_id is None
+    assert ul.feature_tag == 'ul' and ul.feature_id == 'list' and ul.feature_classes == ['list']
+    assert li1.parent_id == 0 and li1.feature_id is None and li1.text == 'Item 1'
+
+    # pseudo-classes are skipped, classes starting with a digit are kept in features only
+    assert li1.features == (('tag', 'li'), ('class', 'item'), ('class', '1st'))
+    assert li1.feature_classes == ['item']
+    assert li2.attrs == {'class': '1st', 'href': '/2'}
+
+    # class lists are interned
+    assert table.classes_codes[1] == table.classes_codes[2]
+
+    # parent index, depth and root
+    assert table.parent_idx.tolist() == [-1, 0, 0, -1]
+    assert table.depth.tolist() == [0, 1, 1, 0]
+    assert table.root_idx.tolist() == [0, 0, 0, 3]
+
+    assert span.to_dict() == {'id': 4, 'parent_id': 3, 'features': [['tag', 'span']], 'text': None}
+    assert li1 == table.nodes[1] and li1 != li2
+
+
+def test_node_table_features_interned():
+    # node ids of the parsed document are not features, so identical items share their feature list
+    table = NodeTable()
+    table.append(0, None, [('tag', 'ul'), ('node-id', 0)])
+    for i in range(1, 4):
+        table.append(i, 0, [('tag', 'li'), ('class', 'item'), ('node-id', i)])
+    table.build()
+
+    assert table.nodes[1].features == (('tag', 'li'), ('class', 'item'))
+    assert table.features_codes.tolist() == [0, 1, 1, 1]
+    assert len(table.features) == 2
@@ -0,0 +1,35 @@
+from webspot.graph.vocabulary import FeatureVocabulary
+
+features_list = [
+    (('tag', 'ul'), ('class', 'list')),
+    (('tag', 'li'), ('class', 'item'), ('href', '/1')),
+    (('tag', 'li'), ('class', 'item'), ('class', 'item')),
+]
+
+
+def test_encode():
+    vocabulary = FeatureVocabulary()
+    columns_list, names = vocabulary.encode(features_list, keys={'tag', 'class'})
+
+    # columns are sorted by name, features with other keys are skipped
+    assert names == ['class=item', 'class=list', 'tag=li', 'tag=ul']
+    assert [c.tolist() for c in columns_list] == [[1, 3], [0, 2], [0, 2]]
+
+    # features are interned across pages
+    vocabulary.encode(features_list[1:], keys={'tag', 'class'})
+    assert len(vocabulary) == 4
+    assert vocabulary.stats.misses == 4
+
+
+def test_evict():
+    vocabulary = FeatureVocabulary(max_size=4)
+    vocabulary.encode([(('tag', 'ul'), ('class', 'a'), ('class', 'b'))])
+    vocabulary.encode([(('tag', 'li'), ('class', 'c'))])
+
+    # least recently used features are evicted before encoding the next page
+    columns_list, names = vocabulary.encode([(('tag', 'li'),)])
+    assert vocabulary.generation == 1
+    assert len(vocabulary) == 2
+    assert names == ['tag=li']
+    assert columns_list[0].tolist() == [0]
+    assert set(vocabulary.features_ids.keys()) == {('tag', 'li'), ('class', 'c')}
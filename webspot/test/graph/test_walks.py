@@ -0,0 +1,39 @@
+import numpy as np
+
+from webspot.graph.walks import random_walk
+
+# 0 -> 1, 2; 1 -> 3, 4; 2 -> 5; 3, 4, 5 are leaves
+offsets_start = np.array([0, 2, 4, 5, 5, 5])
+offsets_end = np.array([2, 4, 5, 5, 5, 5])
+indices = np.array([1, 2, 3, 4, 5])
+edges = {(0, 1), (0, 2), (1, 3), (1, 4), (2, 5)}
+
+
+def _assert_valid_walks(walks: np.ndarray, nodes: np.ndarray, walk_length: int):
+    assert walks.shape == (len(nodes), walk_length + 1)
+    assert (walks[:, 0] == nodes).all()
+    for walk in walks:
+        steps = walk[walk >= 0]
+        # padding only after the walk has ended
+        assert (walk[len(steps):] == -1).all()
+        for source, target in zip(steps[:-1], steps[1:]):
+            assert (source, target) in edges
+        # walks end at leaves unless the walk length is reached
+        if len(steps) < walk_length + 1:
+            assert offsets_end[steps[-1]] == offsets_start[steps[-1]]
+
+
+def test_random_walk():
+    nodes = np.repeat(np.arange(6), 20)
+    walks = random_walk(offsets_start, offsets_end, indices, nodes, walk_length=4, rng=np.random.default_rng(0))
+    _assert_valid_walks(walks, nodes, walk_length=4)
+
+    # all children are visited
+    assert set(walks[nodes == 0, 1]) == {1, 2}
+
+
+def test_random_walk_seed():
+    nodes = np.arange(6)
+    walks_a = random_walk(offsets_start, offsets_end, indices, nodes, walk_length=4, rng=np.random.default_rng(42))
+    walks_b = random_walk(offsets_start, offsets_end, indices, nodes, walk_length=4, rng=np.random.default_rng(42))
+    assert (walks_a == walks_b).all()
@@ -0,0 +1,35 @@
+from webspot.detect.utils.transform_html_links import transform_soup_links
+from webspot.request.html_document import HtmlDocument
+
+html = '''<!DOCTYPE html>
+<html>
+<head><title>Test</title></head>
+<body>
+    <div class="list">
+        <a href="/item/1">Item 1</a>
+        <a href="/item/2">Item 2</a>
+    </div>
+</body>
+</html>'''
+
+
+def test_html_document():
+    document = HtmlDocument(html)
+
+    # node ids are assigned once and kept in html and json data
+    assert document.json_data.get('_id') == 0
+    assert document.soup.select_one('div.list').attrs.get('node-id') is not None
+    assert 'node-id="0"' in document.html
+
+
+def test_copy_soup():
+    document = HtmlDocument(html)
+
+    # copy is identical to the parsed document
+    soup = document.copy_soup()
+    assert str(soup) == document.html
+
+    # modifying the copy does not affect the shared document
+    transform_soup_links(soup, 'https://example.com')
+    assert 'https://example.com/item/1' in str(soup)
+    assert 'https://example.com/item/1' not in document.html
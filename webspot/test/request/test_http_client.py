@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+
+from webspot.request.html_requester import HtmlRequester
+from webspot.request.http_client import AsyncHttpClient, get_backoff_delay
+
+
+def test_backoff_delay():
+    for attempt in range(8):
+        delay = get_backoff_delay(attempt, base=0.1, max_delay=1.)
+        assert 0 <= delay <= min(1., 0.1 * 2 ** attempt)
+
+
+def test_retry():
+    statuses = [503, 429, 200]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(statuses[len(requests) - 1], text='<html><body></body></html>')
+
+    client = AsyncHttpClient(max_attempts=3, backoff_base=0., transport=httpx.MockTransport(handler))
+    res = asyncio.run(client.get('https://example.com'))
+    assert res.status_code == 200
+    assert len(requests) == 3
+
+    # last response is returned when attempts are exhausted
+    requests.clear()
+    statuses = [503, 503, 503]
+    res = asyncio.run(client.get('https://example.com'))
+    assert res.status_code == 503
+    assert len(requests) == 3
+
+
+def test_max_connections_per_host():
+    active = {'example.com': 0, 'example.org': 0}
+    max_active = {'example.com': 0, 'example.org': 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        max_active[host] = max(max_active[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    async def run():
+        client = AsyncHttpClient(max_connections_per_host=2, transport=httpx.MockTransport(handler))
+        urls = [f'https://example.{tld}/{i}' for tld in ['com', 'org'] for i in range(6)]
+        await asyncio.gather(*[client.get(url) for url in urls])
+        await client.aclose()
+
+    asyncio.run(run())
+    assert max_active == {'example.com': 2, 'example.org': 2}
+
+
+def test_html_requester_run_async():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content='<html><body><p>Hello</p></body></html>'.encode('gbk'))
+
+    html_requester = HtmlRequester(
+        url='https://example.com',
+        http_client=AsyncHttpClient(transport=httpx.MockTransport(handler)),
+    )
+    asyncio.run(html_requester.run_async())
+    assert html_requester.document.soup.select_one('p').text == 'Hello'
@@ -0,0 +1,21 @@
+import pytest
+
+from webspot.utils.selector import is_valid_css_selector, _is_valid_css_selector_cssutils
+
+params_selector = [
+    ('div', True),
+    ('#main', True),
+    ('div#main', True),
+    ('item.card.p-4', True),
+    ('li.item:nth-of-type(2)', True),
+    ('li.item:last-child', True),
+    ('a.w-1/2', False),
+    ('a..b', False),
+    ('a.!b', False),
+]
+
+
+@pytest.mark.parametrize('selector, expected', params_selector)
+def test_is_valid_css_selector(selector, expected):
+    assert is_valid_css_selector(selector) == expected
+    assert is_valid_css_selector(selector) == _is_valid_css_selector_cssutils(selector)
@@ -1,7 +1,30 @@
+import re
+from functools import lru_cache
+
 import cssutils
 
+# grammar of the selectors generated by webspot itself
+# (tag, #id and .class chains, optionally followed by :nth-of-type(n) or :last-child)
+_CSS_NON_ASCII = r'[^\x00-\x7f]'
+_CSS_IDENT = rf'-{{0,2}}(?:[_a-zA-Z]|{_CSS_NON_ASCII})(?:[-_a-zA-Z0-9]|{_CSS_NON_ASCII})*'
+_CSS_NAME = rf'(?:[-_a-zA-Z0-9]|{_CSS_NON_ASCII})+'
+_CSS_PSEUDO_CLASS = r':(?:nth-of-type\(\d+\)|last-child)'
+_CSS_COMPOUND_SELECTOR_RE = re.compile(
+    rf'(?:{_CSS_IDENT})?(?:#{_CSS_NAME}|\.{_CSS_IDENT})*(?:{_CSS_PSEUDO_CLASS})?'
+)
+
 
+@lru_cache(maxsize=65536)
 def is_valid_css_selector(selector: str) -> bool:
+    # fast path for selectors of the generated grammar
+    if selector and _CSS_COMPOUND_SELECTOR_RE.fullmatch(selector) is not None:
+        return True
+
+    # fall back to cssutils for unusual selectors
+    return _is_valid_css_selector_cssutils(selector)
+
+
+def _is_valid_css_selector_cssutils(selector: str) -> bool:
     try:
         return cssutils.css.CSSStyleRule(selectorText=selector).selectorList is not None
     except:
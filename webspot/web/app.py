@@ -5,6 +5,8 @@ from fastapi.templating import Jinja2Templates
 from starlette.staticfiles import StaticFiles
 
 from webspot.db.connect import connect as db_connect
+from webspot.extract.job_scheduler import job_scheduler
+from webspot.request.http_client import http_client
 from webspot.web.routes import init_routes
 
 # root path
@@ -16,6 +18,19 @@ app = FastAPI()
 # connect db
 db_connect()
 
+# start detection workers (heavy modules are imported once by the fork server)
+@app.on_event('startup')
+async def startup():
+    job_scheduler.worker_pool.start()
+
+
+# close pooled connections of the shared http client and stop detection workers
+@app.on_event('shutdown')
+async def shutdown():
+    await http_client.aclose()
+    job_scheduler.shutdown()
+
+
 # static files
 app.mount('/static', StaticFiles(directory=os.path.join(root_path, 'static')), name='static')
 
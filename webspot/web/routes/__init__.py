@@ -7,3 +7,4 @@ def init_routes():
     __import__(f'{MODULE_PREFIX}.index')
     __import__(f'{MODULE_PREFIX}.api.request')
     __import__(f'{MODULE_PREFIX}.api.link')
+    __import__(f'{MODULE_PREFIX}.api.stats')
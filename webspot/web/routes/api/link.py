@@ -1,15 +1,17 @@
 from typing import List
 
-from fastapi import Body
+from fastapi import Body, HTTPException
+from starlette.concurrency import run_in_threadpool
 
-from webspot.constants.request_status import REQUEST_STATUS_SUCCESS
+from webspot.constants.request_status import REQUEST_STATUS_SUCCESS, REQUEST_STATUS_QUEUED
 from webspot.detect.utils.transform_html_links import transform_url
-from webspot.extract.extract_results import extract_rules
+from webspot.extract.extract_results import get_detectors_from_results
+from webspot.extract.job_scheduler import job_scheduler
 from webspot.models.link_list import LinkListResult, Link
 from webspot.models.request import Request
 from webspot.web.app import app
 from webspot.web.models.payload.request import RequestPayload
-from webspot.web.routes.api.request import update_request
+from webspot.web.routes.api.request import update_request, submit_request_job
 
 
 @app.post('/api/links')
@@ -19,6 +21,10 @@ async def requests(payload: RequestPayload = Body(
         'html': '<html>...</html>',
     }
 )) -> List[LinkListResult]:
+    # push back if too many requests are queued
+    if job_scheduler.full:
+        raise HTTPException(status_code=429, detail='Too many requests in queue, please retry later')
+
     d = Request(
         url=payload.url,
         html=payload.html,
@@ -26,20 +32,17 @@ async def requests(payload: RequestPayload = Body(
         no_async=True,
         detectors=payload.detectors,
         duration=payload.duration,
+        status=REQUEST_STATUS_QUEUED,
     )
     d.save()
 
     # extract rules
-    results, execution_time, html_requester, graph_loader, detectors = extract_rules(
-        url=d.url,
-        method=d.method,
-        duration=d.duration,
-        html=d.html,
-        detectors=d.detectors,
-    )
+    results, execution_time, html_requester = await submit_request_job(d)
+    detectors = get_detectors_from_results(results, html_requester, d.detectors)
 
     # update request
-    update_request(
+    await run_in_threadpool(
+        update_request,
         d=d,
         status=REQUEST_STATUS_SUCCESS,
         html_requester=html_requester,
@@ -79,7 +82,7 @@ async def requests(payload: RequestPayload = Body(
             text_length = 0
 
             # items elements
-            el_items = graph_loader.soup.select(list_items_selector)
+            el_items = html_requester.document.soup.select(list_items_selector)
 
             # iterate items
             for el_item in el_items:
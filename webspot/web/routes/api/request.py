@@ -1,19 +1,22 @@
-import threading
+import asyncio
 import traceback
 from typing import List
 
 from bs4 import BeautifulSoup
-from fastapi import Body
-from html_to_json_enhanced import convert
+from fastapi import Body, HTTPException
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import HTMLResponse
 
-from webspot.constants.request_status import REQUEST_STATUS_SUCCESS, REQUEST_STATUS_ERROR
-from webspot.detect.utils.highlight_html import embed_highlight, embed_annotate
-from webspot.detect.utils.transform_html_links import transform_html_links
-from webspot.extract.extract_results import extract_rules
+from webspot.constants.request_status import REQUEST_STATUS_SUCCESS, REQUEST_STATUS_ERROR, REQUEST_STATUS_QUEUED, \
+    REQUEST_STATUS_RUNNING
+from webspot.detect.utils.highlight_html import embed_highlight, embed_annotate_soup
+from webspot.detect.utils.transform_html_links import transform_soup_links
+from webspot.extract.extract_results import highlight_results, get_detectors_from_results
+from webspot.extract.job_scheduler import job_scheduler
 from webspot.graph.graph_loader import GraphLoader
 from webspot.models.node import NodeOut, Node
 from webspot.models.request import Request, RequestOut
+from webspot.request.html_document import HtmlDocument
 from webspot.request.html_requester import HtmlRequester
 from webspot.web.app import app
 from webspot.web.logging import logger
@@ -40,7 +43,10 @@ async def request_html(id: str, mode: str = 'highlight') -> HTMLResponse:
     """Get a request."""
     d = Request.objects(pk=id).first()
     if mode == 'annotate':
-        return HTMLResponse(content=embed_annotate(transform_html_links(d.html_highlighted, d.url)))
+        soup = BeautifulSoup(d.html_highlighted, 'html.parser')
+        transform_soup_links(soup, d.url)
+        embed_annotate_soup(soup)
+        return HTMLResponse(content=str(soup))
     else:
         return HTMLResponse(content=embed_highlight(d.html_highlighted))
 
@@ -49,11 +55,11 @@ async def request_html(id: str, mode: str = 'highlight') -> HTMLResponse:
 async def request_node(id: str, node_id: int) -> dict:
     """Get a request."""
     d = Request.objects(pk=id).first()
-    json_data = convert(d.html)
-    graph_loader = GraphLoader(d.html, json_data)
+    document = HtmlDocument(d.html)
+    graph_loader = GraphLoader(document.html, document=document)
     graph_loader.run()
     n = graph_loader.get_node_by_id(node_id)
-    return n
+    return n.to_dict() if n is not None else None
 
 
 @app.post('/api/requests/{id}/nodes')
@@ -108,6 +114,10 @@ async def request(payload: RequestPayload = Body(
     }
 )) -> RequestOut:
     """Create a request. This is used to generate a new request to detect a web page."""
+    # push back if too many requests are queued
+    if job_scheduler.full:
+        raise HTTPException(status_code=429, detail='Too many requests in queue, please retry later')
+
     d = Request(
         url=payload.url,
         html=payload.html,
@@ -115,35 +125,56 @@ async def request(payload: RequestPayload = Body(
         no_async=payload.no_async,
         detectors=payload.detectors,
         duration=payload.duration,
+        status=REQUEST_STATUS_QUEUED,
     )
     d.save()
 
     if payload.html:
         d.no_async = True
 
+    # queue job
+    job = submit_request_job(d)
+
     if d.no_async:
-        # run request (sync)
-        d = _run_request(d)
+        # wait for results
+        d = await _run_request(d, job)
     else:
-        # run request (async)
-        t = threading.Thread(target=_run_request, args=[d])
-        t.start()
+        # update request in background
+        task = asyncio.create_task(_run_request(d, job))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
     return d.to_out()
 
 
-def _run_request(d: Request):
+# references to background requests (tasks are only weakly referenced by the event loop)
+_background_tasks = set()
+
+
+def submit_request_job(d: Request) -> asyncio.Task:
+    async def on_running():
+        # running once the page is fetched and detection starts
+        d.status = REQUEST_STATUS_RUNNING
+        await run_in_threadpool(d.save)
+
+    return job_scheduler.submit(
+        url=d.url,
+        method=d.method,
+        duration=d.duration,
+        html=d.html,
+        detectors=d.detectors,
+        on_running=on_running,
+    )
+
+
+async def _run_request(d: Request, job: asyncio.Task):
     try:
-        results, execution_time, html_requester, graph_loader, detectors = extract_rules(
-            url=d.url,
-            method=d.method,
-            duration=d.duration,
-            html=d.html,
-            detectors=d.detectors,
-        )
+        results, execution_time, html_requester = await job
+        detectors = get_detectors_from_results(results, html_requester, d.detectors)
 
         # update request
-        update_request(
+        await run_in_threadpool(
+            update_request,
             d=d,
             status=REQUEST_STATUS_SUCCESS,
             html_requester=html_requester,
@@ -172,11 +203,9 @@ def update_request(d: Request, status: str, **kwargs):
     results = kwargs.get('results')
 
     d.status = status
+    html_requester.load_document()
     d.html = html_requester.html_
-    html = html_requester.html
-    for detector in detectors:
-        html = detector.highlight_html(html)
-    d.html_highlighted = html
+    d.html_highlighted = highlight_results(html_requester, detectors)
     d.execution_time = execution_time
     d.results = results
     d.save()
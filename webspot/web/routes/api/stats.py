@@ -0,0 +1,18 @@
+from webspot.extract.job_scheduler import job_scheduler
+from webspot.extract.worker_pool import get_cache_stats
+from webspot.web.app import app
+
+
+@app.get('/api/stats/cache')
+async def stats_cache() -> dict:
+    """Get stats of the caches of the web process, and the latest ones of each detection worker (by pid)."""
+    return {
+        **get_cache_stats(),
+        'workers': job_scheduler.worker_pool.workers_cache_stats,
+    }
+
+
+@app.get('/api/stats/jobs')
+async def stats_jobs() -> dict:
+    """Get stats of the job scheduler."""
+    return job_scheduler.dict()